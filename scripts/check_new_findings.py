@@ -4,40 +4,26 @@
 检查是否有新的敏感内容发现
 """
 
-import json
 import os
-import hashlib
+import sys
+import heapq
+from collections import Counter, defaultdict
 from datetime import datetime
 
+from json_utils import load_json, dump_json
+from scan_hash import results_hash, legacy_results_hash
+
 
 def calculate_results_hash(results_file='reports/raw_data.json'):
     """计算结果的哈希值"""
     try:
-        with open(results_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 提取关键信息用于哈希计算
-        key_data = []
-        for result in data.get('results', []):
-            key_info = {
-                'repo': result['repository']['full_name'],
-                'file': result['file']['path'],
-                'matches': result['file']['match_count'],
-                'last_modified': result.get('time_info', {}).get('last_commit', {}).get('last_modified', '')
-            }
-            key_data.append(key_info)
-        
-        # 按仓库和文件路径排序以确保一致性
-        key_data.sort(key=lambda x: (x['repo'], x['file']))
-        
-        # 计算哈希
-        content = json.dumps(key_data, sort_keys=True).encode()
-        return hashlib.sha256(content).hexdigest()
+        data = load_json(results_file)
+        return results_hash(data.get('results', []))
         
     except FileNotFoundError:
         print("❌ 结果文件不存在")
         return None
-    except Exception as e:
+    except (OSError, ValueError, KeyError, TypeError) as e:
         print(f"❌ 计算哈希失败: {e}")
         return None
 
@@ -54,28 +40,63 @@ def check_for_new_findings():
     print(f"📊 当前结果哈希: {current_hash[:12]}...")
     print(f"📊 上次结果哈希: {previous_hash[:12] if previous_hash else 'None'}...")
     
-    # 如果是首次运行或哈希不同，则认为有新发现
-    has_new_findings = (not previous_hash) or (current_hash != previous_hash)
-    
     # 加载当前结果
     try:
-        with open('reports/raw_data.json', 'r', encoding='utf-8') as f:
-            current_data = json.load(f)
-    except:
+        current_data = load_json('reports/raw_data.json')
+    except (OSError, ValueError):
         current_data = {'results': []}
     
+    # 如果是首次运行或哈希不同，则认为有新发现
+    has_new_findings = (not previous_hash) or (current_hash != previous_hash)
+    
+    # 上次的哈希可能还是旧格式（SHA-256），与本次结果的旧格式哈希相同时视为未变化
+    if has_new_findings and previous_hash and is_legacy_hash_match(current_data, previous_hash):
+        print("ℹ️ 上次结果哈希为旧格式，与本次结果一致，视为无新发现")
+        has_new_findings = False
+    
     # 分析新发现的详情
     new_findings_info = analyze_findings(current_data, has_new_findings, previous_hash)
     
     return has_new_findings, new_findings_info
 
 
+def is_legacy_hash_match(current_data, previous_hash):
+    """上次的哈希是否为本次结果按旧格式计算的哈希"""
+    try:
+        return legacy_results_hash(current_data.get('results', [])) == previous_hash
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
 def analyze_findings(current_data, has_new_findings, previous_hash):
     """分析发现的详情"""
     results = current_data.get('results', [])
     total_files = len(results)
-    public_files = sum(1 for r in results if not r['repository']['private'])
-    total_matches = sum(r['file']['match_count'] for r in results)
+    public_files = 0
+    total_matches = 0
+    repo_matches = {}
+    
+    # 一次遍历同时统计公开文件数、总匹配数和按仓库聚合的匹配信息
+    for result in results:
+        repository = result['repository']
+        matches = result['file']['match_count']
+        
+        if not repository['private']:
+            public_files += 1
+        total_matches += matches
+        
+        repo_name = repository['full_name']
+        repo_entry = repo_matches.get(repo_name)
+        if repo_entry is None:
+            repo_entry = repo_matches[repo_name] = {
+                'name': repo_name,
+                'total_matches': 0,
+                'file_count': 0,
+                'is_private': repository['private']
+            }
+        
+        repo_entry['total_matches'] += matches
+        repo_entry['file_count'] += 1
     
     # 风险等级
     if public_files > 0:
@@ -99,54 +120,39 @@ def analyze_findings(current_data, has_new_findings, previous_hash):
         'private_files': total_files - public_files,
         'total_matches': total_matches,
         'risk_level': risk_level,
-        'repositories': list(set(r['repository']['full_name'] for r in results)),
-        'top_repositories': get_top_repositories(results),
+        'repositories': list(repo_matches),
+        'top_repositories': get_top_repositories(repo_matches),
         'file_types': get_file_type_distribution(results)
     }
     
     return analysis
 
 
-def get_top_repositories(results):
-    """获取匹配最多的仓库"""
-    repo_matches = {}
-    for result in results:
-        repo_name = result['repository']['full_name']
-        matches = result['file']['match_count']
-        
-        if repo_name not in repo_matches:
-            repo_matches[repo_name] = {
-                'name': repo_name,
-                'total_matches': 0,
-                'file_count': 0,
-                'is_private': result['repository']['private']
-            }
-        
-        repo_matches[repo_name]['total_matches'] += matches
-        repo_matches[repo_name]['file_count'] += 1
-    
-    # 按匹配数排序
-    top_repos = sorted(repo_matches.values(), key=lambda x: x['total_matches'], reverse=True)
-    return top_repos[:5]  # 返回前5个
+def get_top_repositories(repo_matches):
+    """获取匹配最多的仓库（repo_matches 为 analyze_findings 中按仓库聚合的结果）"""
+    # 按匹配数取前5个，nlargest 与 sorted(..., reverse=True)[:5] 结果一致
+    return heapq.nlargest(5, repo_matches.values(), key=lambda x: x['total_matches'])
 
 
 def get_file_type_distribution(results):
     """获取文件类型分布"""
-    file_types = {}
+    counts = Counter()
+    total_matches = defaultdict(int)
     for result in results:
-        file_path = result['file']['path']
-        ext = file_path.split('.')[-1].lower() if '.' in file_path else 'no_extension'
-        
-        if ext not in file_types:
-            file_types[ext] = {
-                'count': 0,
-                'total_matches': 0
-            }
-        
-        file_types[ext]['count'] += 1
-        file_types[ext]['total_matches'] += result['file']['match_count']
+        file_info = result['file']
+        # .env 这类以点开头、没有其他点的文件名，整个名字就是扩展名（splitext 会返回空扩展名）
+        name = os.path.basename(file_info['path'])
+        ext = os.path.splitext(name)[1] or (name if name.startswith('.') else '')
+        # 扩展名种类很少，intern 后字典查找可以直接比较指针
+        ext = sys.intern(ext[1:].lower() or 'no_extension')
+        counts[ext] += 1
+        total_matches[ext] += file_info['match_count']
     
-    return dict(sorted(file_types.items(), key=lambda x: x[1]['count'], reverse=True))
+    # most_common 按数量降序，数量相同时保持首次出现的顺序
+    return {
+        ext: {'count': count, 'total_matches': total_matches[ext]}
+        for ext, count in counts.most_common()
+    }
 
 
 def save_check_results(has_new_findings, analysis):
@@ -158,8 +164,7 @@ def save_check_results(has_new_findings, analysis):
     }
     
     os.makedirs('reports', exist_ok=True)
-    with open('reports/new_findings_check.json', 'w', encoding='utf-8') as f:
-        json.dump(check_results, f, indent=2, ensure_ascii=False)
+    dump_json(check_results, 'reports/new_findings_check.json')
     
     # 设置 GitHub Actions 输出
     with open(os.environ.get('GITHUB_OUTPUT', '/dev/stdout'), 'a') as f:
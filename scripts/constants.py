@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+共享常量
+多个脚本共用的只读常量
+"""
+
+from types import MappingProxyType
+
+
+# 风险等级对应的图标
+RISK_EMOJIS = MappingProxyType({
+    'CRITICAL': '🚨',
+    'HIGH': '⚠️',
+    'MEDIUM': '🟡',
+    'LOW': '🟢',
+    'NONE': '✅'
+})
@@ -4,48 +4,222 @@
 生成多种格式的安全扫描报告
 """
 
-import json
+import argparse
 import os
+import time
 from datetime import datetime
-from typing import Dict, List
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional
 import csv
+import heapq
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from constants import RISK_EMOJIS
+from json_utils import load_json, dump_json
+
+
+# 报告文件写缓冲区大小（1 MiB），减少小块写入的系统调用
+WRITE_BUFFER_SIZE = 1 << 20
+
+# 支持的报告格式及其输出文件说明
+REPORT_FORMATS = {
+    'text': "reports/search_results.txt     (文本格式)",
+    'json': "reports/detailed_report.json  (详细 JSON)",
+    'csv': "reports/search_results.csv    (CSV 表格)",
+    'md': "reports/search_results.md     (Markdown)",
+    'summary': "reports/summary.json          (摘要)"
+}
+
+# 文本报告分隔线
+SEPARATOR_LINE = "=" * 80 + "\n"
+
+# CSV 报告列名（_iter_csv_rows 按此顺序输出各列）
+CSV_FIELDNAMES = (
+    'repository_name', 'repository_owner', 'repository_private', 'repository_url',
+    'file_path', 'file_name', 'file_url', 'file_size', 'match_count',
+    'first_created', 'first_author', 'last_modified', 'last_author',
+    'file_age_days', 'total_commits', 'last_commit_sha', 'change_status',
+    'additions', 'deletions', 'repo_stars', 'repo_forks', 'repo_language'
+)
+
+# 文本报告中单个结果的固定格式片段
+TXT_RESULT_TMPL = (
+    "{index}. 仓库: {full_name}\n"
+    "   文件: {path}\n"
+    "   URL: {html_url}\n"
+    "   仓库类型: {repo_type}\n"
+    "   文件大小: {size} bytes\n"
+    "   匹配次数: {match_count}\n"
+    "\n   📅 时间信息:\n"
+)
+TXT_FIRST_COMMIT_TMPL = (
+    "   ├─ 首次创建: {first_created}\n"
+    "   ├─ 创建作者: {first_author}\n"
+    "   ├─ 创建提交: {first_commit_sha}\n"
+    "   ├─ 创建消息: {first_commit_message}\n"
+)
+TXT_LAST_COMMIT_TMPL = (
+    "   ├─ 最后修改: {last_modified}\n"
+    "   ├─ 修改作者: {last_author}\n"
+    "   ├─ 最新提交: {last_commit_sha}\n"
+    "   ├─ 提交消息: {last_commit_message}\n"
+)
+TXT_CHANGE_TMPL = (
+    "\n   📊 最近变更:\n"
+    "   ├─ 状态: {status}\n"
+    "   ├─ 新增行数: {additions}\n"
+    "   ├─ 删除行数: {deletions}\n"
+    "   └─ 总变更行数: {changes}\n"
+)
+TXT_REPO_TMPL = (
+    "\n   🏢 仓库信息:\n"
+    "   ├─ 描述: {description}\n"
+    "   ├─ 主要语言: {language}\n"
+    "   ├─ 创建时间: {created_at}\n"
+    "   └─ Stars: {stars}, Forks: {forks}\n"
+    "\n" + SEPARATOR_LINE + "\n"
+)
+
+# Markdown 报告中单个结果的固定格式片段
+MD_RESULT_TMPL = (
+    "### {index}. {full_name}\n\n"
+    "| 属性 | 值 |\n"
+    "|------|----|\n"
+    "| 文件路径 | [`{path}`]({html_url}) |\n"
+    "| 仓库类型 | {repo_type} |\n"
+    "| 文件大小 | {size} bytes |\n"
+    "| 匹配次数 | {match_count} |\n"
+)
+MD_RESULT_FOOTER_TMPL = (
+    "| 总提交数 | {total_commits} |\n"
+    "| Stars | {stars} |\n"
+    "| Forks | {forks} |\n"
+    "\n"
+)
+
+
+class ReportInputMissing(FileNotFoundError):
+    """报告所需的输入文件不存在"""
+
+
+@dataclass(slots=True)
+class FlatResult:
+    """单个搜索结果的扁平视图，嵌套字段只解析一次，供各格式报告共用"""
+    full_name: str
+    owner: str
+    private: bool
+    repo_url: str
+    description: Optional[str]
+    language: Optional[str]
+    repo_created_at: str
+    stars: int
+    forks: int
+    path: str
+    name: str
+    html_url: str
+    size: int
+    match_count: int
+    file_age_days: Optional[int]
+    total_commits: int
+    commit_history: List[Dict]
+    first_commit: Dict
+    last_commit: Dict
+    change_info: Dict
+    
+    @classmethod
+    def from_result(cls, result: Dict) -> 'FlatResult':
+        """从原始结果构建扁平视图"""
+        repo = result['repository']
+        file_info = result['file']
+        time_info = result.get('time_info', {})
+        
+        return cls(
+            full_name=repo['full_name'],
+            owner=repo['owner'],
+            private=repo['private'],
+            repo_url=repo['html_url'],
+            description=repo.get('description'),
+            language=repo['language'],
+            repo_created_at=repo.get('created_at', 'N/A'),
+            stars=repo['stars'],
+            forks=repo['forks'],
+            path=file_info['path'],
+            name=file_info['name'],
+            html_url=file_info['html_url'],
+            size=file_info['size'],
+            match_count=file_info['match_count'],
+            file_age_days=time_info.get('file_age_days'),
+            total_commits=time_info.get('total_commits', 0),
+            commit_history=time_info.get('commit_history', []),
+            first_commit=time_info.get('first_commit', {}),
+            last_commit=time_info.get('last_commit', {}),
+            change_info=result.get('change_info', {})
+        )
 
 
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, formats: Optional[List[str]] = None, compress_json: bool = False):
         self.raw_data_file = 'reports/raw_data.json'
         self.reports_dir = 'reports'
+        self.formats = list(formats) if formats else list(REPORT_FORMATS)
+        self.compress_json = compress_json
         
         # 确保报告目录存在
         os.makedirs(self.reports_dir, exist_ok=True)
-        
-        # 加载原始数据
-        self.data = self._load_raw_data()
     
-    def _load_raw_data(self) -> Dict:
-        """加载原始数据"""
+    @cached_property
+    def data(self) -> Dict:
+        """原始数据（首次访问时加载）"""
         try:
-            with open(self.raw_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("❌ 原始数据文件不存在，请先运行搜索脚本")
-            exit(1)
-        except Exception as e:
-            print(f"❌ 加载原始数据失败: {e}")
-            exit(1)
+            return load_json(self.raw_data_file)
+        except FileNotFoundError as e:
+            raise ReportInputMissing(f"原始数据文件不存在: {self.raw_data_file}，请先运行搜索脚本") from e
+    
+    @cached_property
+    def summary(self) -> Dict:
+        """统计摘要（多个报告共用，只计算一次）"""
+        return self._calculate_summary(self.data.get('results', []))
+    
+    @cached_property
+    def flat_results(self) -> List[FlatResult]:
+        """所有结果的扁平视图（文本、CSV、Markdown 报告共用）"""
+        return [FlatResult.from_result(r) for r in self.data.get('results', [])]
     
     def generate_all_reports(self):
         """生成所有格式的报告"""
         print("📝 开始生成报告...")
         
-        self.generate_text_report()
-        self.generate_detailed_json_report()
-        self.generate_csv_report()
-        self.generate_markdown_report()
-        self.generate_summary_report()
+        # 先计算共享数据，避免多个线程同时触发计算
+        self.summary
+        self.flat_results
+        
+        generators = {
+            'text': self.generate_text_report,
+            'json': self.generate_detailed_json_report,
+            'csv': self.generate_csv_report,
+            'md': self.generate_markdown_report,
+            'summary': self.generate_summary_report
+        }
+        
+        # 只生成请求的格式；各报告写入不同文件，可并行生成
+        with ThreadPoolExecutor(max_workers=len(self.formats)) as executor:
+            futures = {
+                fmt: executor.submit(self._timed, generators[fmt])
+                for fmt in self.formats
+            }
+            for fmt, future in futures.items():
+                print(f"⏱️  {fmt} 报告耗时: {future.result():.3f} 秒")
         
         print("✅ 所有报告已生成完成！")
     
+    def _timed(self, generator) -> float:
+        """执行报告生成函数并返回耗时（秒）"""
+        start = time.perf_counter()
+        generator()
+        return time.perf_counter() - start
+    
     def generate_text_report(self):
         """生成文本格式报告"""
         print("📄 生成文本报告...")
@@ -53,16 +227,18 @@ class ReportGenerator:
         results = self.data.get('results', [])
         total_found = self.data.get('total_found', 0)
         
-        with open(f'{self.reports_dir}/search_results.txt', 'w', encoding='utf-8') as f:
-            f.write(f"GitHub 代码搜索结果报告\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"扫描时间: {self.data.get('scan_time', 'N/A')}\n")
-            f.write(f"搜索查询: {self.data.get('search_query', 'N/A')}\n")
-            f.write(f"搜索模式: {self.data.get('search_pattern', 'N/A')}\n")
-            f.write(f"文件类型: {', '.join(self.data.get('file_extensions', []))}\n")
-            f.write(f"搜索范围: {self.data.get('search_scope', '全部公开仓库')}\n")
-            f.write(f"总共找到: {total_found} 个结果\n")
-            f.write(f"已分析: {len(results)} 个文件\n\n")
+        with open(f'{self.reports_dir}/search_results.txt', 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines([
+                "GitHub 代码搜索结果报告\n",
+                SEPARATOR_LINE,
+                f"扫描时间: {self.data.get('scan_time', 'N/A')}\n",
+                f"搜索查询: {self.data.get('search_query', 'N/A')}\n",
+                f"搜索模式: {self.data.get('search_pattern', 'N/A')}\n",
+                f"文件类型: {', '.join(self.data.get('file_extensions', []))}\n",
+                f"搜索范围: {self.data.get('search_scope', '全部公开仓库')}\n",
+                f"总共找到: {total_found} 个结果\n",
+                f"已分析: {len(results)} 个文件\n\n"
+            ])
             
             if not results:
                 f.write("✅ 未发现包含敏感内容的文件\n")
@@ -70,134 +246,144 @@ class ReportGenerator:
             
             f.write("⚠️  发现以下文件包含敏感内容:\n\n")
             
-            for i, result in enumerate(results, 1):
-                self._write_file_details(f, i, result)
+            for i, flat in enumerate(self.flat_results, 1):
+                f.write(self._format_file_details(i, flat))
     
-    def _write_file_details(self, f, index: int, result: Dict):
-        """写入文件详细信息"""
-        repo = result['repository']
-        file_info = result['file']
-        time_info = result.get('time_info', {})
-        first_commit = time_info.get('first_commit', {})
-        last_commit = time_info.get('last_commit', {})
-        change_info = result.get('change_info', {})
-        
-        f.write(f"{index}. 仓库: {repo['full_name']}\n")
-        f.write(f"   文件: {file_info['path']}\n")
-        f.write(f"   URL: {file_info['html_url']}\n")
-        f.write(f"   仓库类型: {'私有' if repo['private'] else '公开'}\n")
-        f.write(f"   文件大小: {file_info['size']} bytes\n")
-        f.write(f"   匹配次数: {file_info['match_count']}\n")
+    def _format_file_details(self, index: int, flat: FlatResult) -> str:
+        """格式化单个文件的详细信息（文本报告）"""
+        first_commit = flat.first_commit
+        last_commit = flat.last_commit
+        change_info = flat.change_info
+        
+        parts = [TXT_RESULT_TMPL.format(
+            index=index,
+            full_name=flat.full_name,
+            path=flat.path,
+            html_url=flat.html_url,
+            repo_type='私有' if flat.private else '公开',
+            size=flat.size,
+            match_count=flat.match_count
+        )]
         
         # 详细时间信息
-        f.write(f"\n   📅 时间信息:\n")
         if first_commit:
-            f.write(f"   ├─ 首次创建: {first_commit.get('first_created', 'N/A')}\n")
-            f.write(f"   ├─ 创建作者: {first_commit.get('first_author', 'N/A')}\n")
-            f.write(f"   ├─ 创建提交: {first_commit.get('first_commit_sha', 'N/A')[:8]}\n")
-            f.write(f"   ├─ 创建消息: {first_commit.get('first_commit_message', 'N/A')}\n")
+            parts.append(TXT_FIRST_COMMIT_TMPL.format(
+                first_created=first_commit.get('first_created', 'N/A'),
+                first_author=first_commit.get('first_author', 'N/A'),
+                first_commit_sha=first_commit.get('first_commit_sha', 'N/A')[:8],
+                first_commit_message=first_commit.get('first_commit_message', 'N/A')
+            ))
         
         if last_commit:
-            f.write(f"   ├─ 最后修改: {last_commit.get('last_modified', 'N/A')}\n")
-            f.write(f"   ├─ 修改作者: {last_commit.get('last_author', 'N/A')}\n")
-            f.write(f"   ├─ 最新提交: {last_commit.get('last_commit_sha', 'N/A')[:8]}\n")
-            f.write(f"   ├─ 提交消息: {last_commit.get('last_commit_message', 'N/A')}\n")
+            parts.append(TXT_LAST_COMMIT_TMPL.format(
+                last_modified=last_commit.get('last_modified', 'N/A'),
+                last_author=last_commit.get('last_author', 'N/A'),
+                last_commit_sha=last_commit.get('last_commit_sha', 'N/A')[:8],
+                last_commit_message=last_commit.get('last_commit_message', 'N/A')
+            ))
         
-        file_age = time_info.get('file_age_days')
-        if file_age is not None:
-            f.write(f"   ├─ 文件年龄: {file_age} 天\n")
+        if flat.file_age_days is not None:
+            parts.append(f"   ├─ 文件年龄: {flat.file_age_days} 天\n")
         
-        total_commits = time_info.get('total_commits', 0)
-        f.write(f"   └─ 总提交数: {total_commits}\n")
+        parts.append(f"   └─ 总提交数: {flat.total_commits}\n")
         
         # 变更信息
         if change_info:
-            f.write(f"\n   📊 最近变更:\n")
-            f.write(f"   ├─ 状态: {change_info.get('status', 'N/A')}\n")
-            f.write(f"   ├─ 新增行数: {change_info.get('additions', 0)}\n")
-            f.write(f"   ├─ 删除行数: {change_info.get('deletions', 0)}\n")
-            f.write(f"   └─ 总变更行数: {change_info.get('changes', 0)}\n")
+            parts.append(TXT_CHANGE_TMPL.format(
+                status=change_info.get('status', 'N/A'),
+                additions=change_info.get('additions', 0),
+                deletions=change_info.get('deletions', 0),
+                changes=change_info.get('changes', 0)
+            ))
             if change_info.get('previous_filename'):
-                f.write(f"   └─ 原文件名: {change_info['previous_filename']}\n")
+                parts.append(f"   └─ 原文件名: {change_info['previous_filename']}\n")
         
         # 修改历史
-        commit_history = time_info.get('commit_history', [])
-        if commit_history:
-            f.write(f"\n   📝 最近修改历史:\n")
-            for j, commit in enumerate(commit_history[:5], 1):
-                f.write(f"   {j}. {commit['date'][:10]} - {commit['author']} - {commit['message']}\n")
-        
-        f.write(f"\n   🏢 仓库信息:\n")
-        f.write(f"   ├─ 描述: {repo['description']}\n")
-        f.write(f"   ├─ 主要语言: {repo['language']}\n")
-        f.write(f"   ├─ 创建时间: {repo.get('created_at', 'N/A')}\n")
-        f.write(f"   └─ Stars: {repo['stars']}, Forks: {repo['forks']}\n")
-        
-        f.write("\n" + "=" * 80 + "\n\n")
+        if flat.commit_history:
+            parts.append("\n   📝 最近修改历史:\n")
+            for j, commit in enumerate(flat.commit_history[:5], 1):
+                parts.append(f"   {j}. {commit['date'][:10]} - {commit['author']} - {commit['message']}\n")
+        
+        parts.append(TXT_REPO_TMPL.format(
+            description=flat.description,
+            language=flat.language,
+            created_at=flat.repo_created_at,
+            stars=flat.stars,
+            forks=flat.forks
+        ))
+        return ''.join(parts)
     
     def generate_detailed_json_report(self):
         """生成详细的 JSON 报告"""
         print("📄 生成详细 JSON 报告...")
         
-        results = self.data.get('results', [])
-        
-        # 计算统计信息
-        summary = self._calculate_summary(results)
-        
         report_data = {
             **self.data,  # 包含原始数据
-            'summary': summary,
+            'summary': self.summary,
             'report_generated_at': datetime.now().isoformat()
         }
         
-        with open(f'{self.reports_dir}/detailed_report.json', 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        if self.compress_json:
+            dump_json(report_data, f'{self.reports_dir}/detailed_report.json.gz', compress=True)
+        else:
+            dump_json(report_data, f'{self.reports_dir}/detailed_report.json')
     
     def _calculate_summary(self, results: List[Dict]) -> Dict:
         """计算统计摘要"""
         if not results:
             return {}
         
-        # 基本统计
-        public_repos = sum(1 for r in results if not r['repository']['private'])
-        private_repos = sum(1 for r in results if r['repository']['private'])
-        total_matches = sum(r['file']['match_count'] for r in results)
-        repositories = list(set(r['repository']['full_name'] for r in results))
-        
-        # 时间统计
-        file_ages = [r.get('time_info', {}).get('file_age_days') for r in results]
-        file_ages = [age for age in file_ages if age is not None]
-        
-        oldest_file_days = max(file_ages) if file_ages else 0
-        newest_file_days = min(file_ages) if file_ages else 0
-        avg_file_age = sum(file_ages) / len(file_ages) if file_ages else 0
+        public_repos = private_repos = total_matches = total_commits = 0
+        # 使用 dict 作为有序集合，保证多次运行输出顺序一致
+        repositories = {}
+        authors = {}
+        file_ages = []
+        extensions = Counter()
+        languages = Counter()
         
-        # 作者统计
-        authors = set()
+        # 单次遍历同时累计所有统计项
         for r in results:
+            repo = r['repository']
+            file_info = r['file']
             time_info = r.get('time_info', {})
+            
+            # 基本统计
+            if repo['private']:
+                private_repos += 1
+            else:
+                public_repos += 1
+            total_matches += file_info['match_count']
+            repositories[repo['full_name']] = None
+            
+            # 时间统计
+            file_age = time_info.get('file_age_days')
+            if file_age is not None:
+                file_ages.append(file_age)
+            
+            # 作者统计
             first_author = time_info.get('first_commit', {}).get('first_author')
             last_author = time_info.get('last_commit', {}).get('last_author')
             if first_author:
-                authors.add(first_author)
+                authors[first_author] = None
             if last_author:
-                authors.add(last_author)
-        
-        # 提交统计
-        total_commits = sum(r.get('time_info', {}).get('total_commits', 0) for r in results)
-        
-        # 文件扩展名统计
-        extensions = {}
-        for r in results:
-            file_path = r['file']['path']
-            ext = file_path.split('.')[-1].lower() if '.' in file_path else 'no_extension'
-            extensions[ext] = extensions.get(ext, 0) + 1
+                authors[last_author] = None
+            
+            # 提交统计
+            total_commits += time_info.get('total_commits', 0)
+            
+            # 文件扩展名统计；.env 这类以点开头、没有其他点的文件名，整个名字就是扩展名
+            name = os.path.basename(file_info['path'])
+            ext = os.path.splitext(name)[1] or (name if name.startswith('.') else '')
+            ext = ext[1:].lower() or 'no_extension'
+            extensions[ext] += 1
+            
+            # 仓库语言统计
+            languages[repo['language'] or 'Unknown'] += 1
         
-        # 仓库语言统计
-        languages = {}
-        for r in results:
-            lang = r['repository']['language'] or 'Unknown'
-            languages[lang] = languages.get(lang, 0) + 1
+        repositories = list(repositories)
+        oldest_file_days = max(file_ages) if file_ages else 0
+        newest_file_days = min(file_ages) if file_ages else 0
+        avg_file_age = sum(file_ages) / len(file_ages) if file_ages else 0
         
         return {
             'public_repos': public_repos,
@@ -211,8 +397,8 @@ class ReportGenerator:
             'total_commits': total_commits,
             'unique_authors': list(authors),
             'author_count': len(authors),
-            'file_extensions': extensions,
-            'repository_languages': languages,
+            'file_extensions': dict(extensions),
+            'repository_languages': dict(languages),
             'risk_level': self._calculate_risk_level(public_repos, total_matches)
         }
     
@@ -234,159 +420,152 @@ class ReportGenerator:
         """生成 CSV 格式报告"""
         print("📄 生成 CSV 报告...")
         
-        results = self.data.get('results', [])
-        
-        with open(f'{self.reports_dir}/search_results.csv', 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'repository_name', 'repository_owner', 'repository_private', 'repository_url',
-                'file_path', 'file_name', 'file_url', 'file_size', 'match_count',
-                'first_created', 'first_author', 'last_modified', 'last_author',
-                'file_age_days', 'total_commits', 'last_commit_sha', 'change_status',
-                'additions', 'deletions', 'repo_stars', 'repo_forks', 'repo_language'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        with open(f'{self.reports_dir}/search_results.csv', 'w', newline='', encoding='utf-8',
+                  buffering=WRITE_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(self._iter_csv_rows())
+    
+    def _iter_csv_rows(self) -> Iterator[tuple]:
+        """逐行生成 CSV 数据（字段顺序与 CSV_FIELDNAMES 一致）"""
+        for flat in self.flat_results:
+            first_commit = flat.first_commit
+            last_commit = flat.last_commit
+            change_info = flat.change_info
             
-            for result in results:
-                repo = result['repository']
-                file_info = result['file']
-                time_info = result.get('time_info', {})
-                first_commit = time_info.get('first_commit', {})
-                last_commit = time_info.get('last_commit', {})
-                change_info = result.get('change_info', {})
-                
-                writer.writerow({
-                    'repository_name': repo['full_name'],
-                    'repository_owner': repo['owner'],
-                    'repository_private': repo['private'],
-                    'repository_url': repo['html_url'],
-                    'file_path': file_info['path'],
-                    'file_name': file_info['name'],
-                    'file_url': file_info['html_url'],
-                    'file_size': file_info['size'],
-                    'match_count': file_info['match_count'],
-                    'first_created': first_commit.get('first_created', ''),
-                    'first_author': first_commit.get('first_author', ''),
-                    'last_modified': last_commit.get('last_modified', ''),
-                    'last_author': last_commit.get('last_author', ''),
-                    'file_age_days': time_info.get('file_age_days', ''),
-                    'total_commits': time_info.get('total_commits', 0),
-                    'last_commit_sha': last_commit.get('last_commit_sha', ''),
-                    'change_status': change_info.get('status', ''),
-                    'additions': change_info.get('additions', 0),
-                    'deletions': change_info.get('deletions', 0),
-                    'repo_stars': repo['stars'],
-                    'repo_forks': repo['forks'],
-                    'repo_language': repo['language']
-                })
+            yield (
+                flat.full_name,
+                flat.owner,
+                flat.private,
+                flat.repo_url,
+                flat.path,
+                flat.name,
+                flat.html_url,
+                flat.size,
+                flat.match_count,
+                first_commit.get('first_created', ''),
+                first_commit.get('first_author', ''),
+                last_commit.get('last_modified', ''),
+                last_commit.get('last_author', ''),
+                flat.file_age_days,
+                flat.total_commits,
+                last_commit.get('last_commit_sha', ''),
+                change_info.get('status', ''),
+                change_info.get('additions', 0),
+                change_info.get('deletions', 0),
+                flat.stars,
+                flat.forks,
+                flat.language
+            )
     
     def generate_markdown_report(self):
         """生成 Markdown 格式报告"""
         print("📄 生成 Markdown 报告...")
         
         results = self.data.get('results', [])
-        summary = self._calculate_summary(results)
-        
-        with open(f'{self.reports_dir}/search_results.md', 'w', encoding='utf-8') as f:
-            f.write("# GitHub 敏感内容搜索报告\n\n")
-            
-            # 概览
-            f.write("## 📊 扫描概览\n\n")
-            f.write(f"- **扫描时间**: {self.data.get('scan_time', 'N/A')}\n")
-            f.write(f"- **搜索模式**: `{self.data.get('search_pattern', 'N/A')}`\n")
-            f.write(f"- **文件类型**: {', '.join(self.data.get('file_extensions', []))}\n")
-            f.write(f"- **搜索范围**: {self.data.get('search_scope', '全部公开仓库')}\n")
-            f.write(f"- **总共找到**: {self.data.get('total_found', 0)} 个结果\n")
-            f.write(f"- **已分析**: {len(results)} 个文件\n\n")
+        summary = self.summary
+        
+        # 整个文档先在内存中拼接，最后一次性写入
+        lines = ["# GitHub 敏感内容搜索报告\n\n"]
+        
+        # 概览
+        lines.append("## 📊 扫描概览\n\n")
+        lines.append(f"- **扫描时间**: {self.data.get('scan_time', 'N/A')}\n")
+        lines.append(f"- **搜索模式**: `{self.data.get('search_pattern', 'N/A')}`\n")
+        lines.append(f"- **文件类型**: {', '.join(self.data.get('file_extensions', []))}\n")
+        lines.append(f"- **搜索范围**: {self.data.get('search_scope', '全部公开仓库')}\n")
+        lines.append(f"- **总共找到**: {self.data.get('total_found', 0)} 个结果\n")
+        lines.append(f"- **已分析**: {len(results)} 个文件\n\n")
+        
+        if summary:
+            # 风险评估
+            risk_level = summary.get('risk_level', 'UNKNOWN')
+            risk_emoji = RISK_EMOJIS.get(risk_level, '❓')
+            lines.append(f"## {risk_emoji} 风险评估: {risk_level}\n\n")
             
-            if summary:
-                # 风险评估
-                risk_level = summary.get('risk_level', 'UNKNOWN')
-                risk_emoji = {'CRITICAL': '🚨', 'HIGH': '⚠️', 'MEDIUM': '🟡', 'LOW': '🟢', 'NONE': '✅'}.get(risk_level, '❓')
-                f.write(f"## {risk_emoji} 风险评估: {risk_level}\n\n")
-                
-                # 统计摘要
-                f.write("## 📈 统计摘要\n\n")
-                f.write(f"- **公开仓库文件**: {summary.get('public_repos', 0)} 个\n")
-                f.write(f"- **私有仓库文件**: {summary.get('private_repos', 0)} 个\n")
-                f.write(f"- **总匹配次数**: {summary.get('total_matches', 0)} 次\n")
-                f.write(f"- **涉及仓库数**: {summary.get('repository_count', 0)} 个\n")
-                f.write(f"- **涉及作者数**: {summary.get('author_count', 0)} 人\n")
-                f.write(f"- **平均文件年龄**: {summary.get('avg_file_age_days', 0)} 天\n")
-                f.write(f"- **总提交次数**: {summary.get('total_commits', 0)} 次\n\n")
-                
-                # 文件扩展名分布
-                extensions = summary.get('file_extensions', {})
-                if extensions:
-                    f.write("### 📁 文件类型分布\n\n")
-                    for ext, count in sorted(extensions.items(), key=lambda x: x[1], reverse=True):
-                        f.write(f"- **{ext}**: {count} 个文件\n")
-                    f.write("\n")
-                
-                # 仓库语言分布
-                languages = summary.get('repository_languages', {})
-                if languages:
-                    f.write("### 💻 仓库语言分布\n\n")
-                    for lang, count in sorted(languages.items(), key=lambda x: x[1], reverse=True):
-                        f.write(f"- **{lang}**: {count} 个仓库\n")
-                    f.write("\n")
+            # 统计摘要
+            lines.append("## 📈 统计摘要\n\n")
+            lines.append(f"- **公开仓库文件**: {summary.get('public_repos', 0)} 个\n")
+            lines.append(f"- **私有仓库文件**: {summary.get('private_repos', 0)} 个\n")
+            lines.append(f"- **总匹配次数**: {summary.get('total_matches', 0)} 次\n")
+            lines.append(f"- **涉及仓库数**: {summary.get('repository_count', 0)} 个\n")
+            lines.append(f"- **涉及作者数**: {summary.get('author_count', 0)} 人\n")
+            lines.append(f"- **平均文件年龄**: {summary.get('avg_file_age_days', 0)} 天\n")
+            lines.append(f"- **总提交次数**: {summary.get('total_commits', 0)} 次\n\n")
             
-            if not results:
-                f.write("## ✅ 扫描结果\n\n")
-                f.write("未发现包含敏感内容的文件。\n\n")
-                return
+            # 文件扩展名分布
+            extensions = summary.get('file_extensions', {})
+            if extensions:
+                lines.append("### 📁 文件类型分布\n\n")
+                lines.extend(f"- **{ext}**: {count} 个文件\n"
+                             for ext, count in sorted(extensions.items(), key=lambda x: x[1], reverse=True))
+                lines.append("\n")
             
+            # 仓库语言分布
+            languages = summary.get('repository_languages', {})
+            if languages:
+                lines.append("### 💻 仓库语言分布\n\n")
+                lines.extend(f"- **{lang}**: {count} 个仓库\n"
+                             for lang, count in sorted(languages.items(), key=lambda x: x[1], reverse=True))
+                lines.append("\n")
+        
+        if not results:
+            lines.append("## ✅ 扫描结果\n\n")
+            lines.append("未发现包含敏感内容的文件。\n\n")
+        else:
             # 详细结果
-            f.write("## 📋 详细发现\n\n")
-            
-            for i, result in enumerate(results, 1):
-                repo = result['repository']
-                file_info = result['file']
-                time_info = result.get('time_info', {})
-                
-                f.write(f"### {i}. {repo['full_name']}\n\n")
-                
-                # 基本信息表格
-                f.write("| 属性 | 值 |\n")
-                f.write("|------|----|\n")
-                f.write(f"| 文件路径 | [`{file_info['path']}`]({file_info['html_url']}) |\n")
-                f.write(f"| 仓库类型 | {'🔒 私有' if repo['private'] else '🌐 公开'} |\n")
-                f.write(f"| 文件大小 | {file_info['size']} bytes |\n")
-                f.write(f"| 匹配次数 | {file_info['match_count']} |\n")
-                
-                first_commit = time_info.get('first_commit', {})
-                last_commit = time_info.get('last_commit', {})
-                
-                if first_commit:
-                    f.write(f"| 首次创建 | {first_commit.get('first_created', 'N/A')[:10]} |\n")
-                    f.write(f"| 创建作者 | {first_commit.get('first_author', 'N/A')} |\n")
-                
-                if last_commit:
-                    f.write(f"| 最后修改 | {last_commit.get('last_modified', 'N/A')[:10]} |\n")
-                    f.write(f"| 修改作者 | {last_commit.get('last_author', 'N/A')} |\n")
-                
-                file_age = time_info.get('file_age_days')
-                if file_age is not None:
-                    f.write(f"| 文件年龄 | {file_age} 天 |\n")
-                
-                f.write(f"| 总提交数 | {time_info.get('total_commits', 0)} |\n")
-                f.write(f"| Stars | {repo['stars']} |\n")
-                f.write(f"| Forks | {repo['forks']} |\n")
-                f.write("\n")
-                
-                # 仓库描述
-                if repo.get('description'):
-                    f.write(f"**描述**: {repo['description']}\n\n")
-                
-                f.write("---\n\n")
+            lines.append("## 📋 详细发现\n\n")
+            lines.extend(self._format_markdown_details(i, flat) for i, flat in enumerate(self.flat_results, 1))
+        
+        with open(f'{self.reports_dir}/search_results.md', 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(''.join(lines))
+    
+    def _format_markdown_details(self, index: int, flat: FlatResult) -> str:
+        """格式化单个文件的详细信息（Markdown 报告）"""
+        first_commit = flat.first_commit
+        last_commit = flat.last_commit
+        
+        # 基本信息表格
+        parts = [MD_RESULT_TMPL.format(
+            index=index,
+            full_name=flat.full_name,
+            path=flat.path,
+            html_url=flat.html_url,
+            repo_type='🔒 私有' if flat.private else '🌐 公开',
+            size=flat.size,
+            match_count=flat.match_count
+        )]
+        
+        if first_commit:
+            parts.append(f"| 首次创建 | {first_commit.get('first_created', 'N/A')[:10]} |\n")
+            parts.append(f"| 创建作者 | {first_commit.get('first_author', 'N/A')} |\n")
+        
+        if last_commit:
+            parts.append(f"| 最后修改 | {last_commit.get('last_modified', 'N/A')[:10]} |\n")
+            parts.append(f"| 修改作者 | {last_commit.get('last_author', 'N/A')} |\n")
+        
+        if flat.file_age_days is not None:
+            parts.append(f"| 文件年龄 | {flat.file_age_days} 天 |\n")
+        
+        parts.append(MD_RESULT_FOOTER_TMPL.format(
+            total_commits=flat.total_commits,
+            stars=flat.stars,
+            forks=flat.forks
+        ))
+        
+        # 仓库描述
+        if flat.description:
+            parts.append(f"**描述**: {flat.description}\n\n")
+        
+        parts.append("---\n\n")
+        return ''.join(parts)
     
     def generate_summary_report(self):
         """生成简要摘要报告"""
         print("📄 生成摘要报告...")
         
         results = self.data.get('results', [])
-        summary = self._calculate_summary(results)
+        summary = self.summary
         
         summary_data = {
             'scan_time': self.data.get('scan_time'),
@@ -398,26 +577,24 @@ class ReportGenerator:
             'recommendations': self._get_recommendations(summary)
         }
         
-        with open(f'{self.reports_dir}/summary.json', 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=2, ensure_ascii=False)
+        dump_json(summary_data, f'{self.reports_dir}/summary.json')
     
     def _get_critical_findings(self, results: List[Dict]) -> List[Dict]:
         """获取关键发现"""
-        critical = []
-        
-        for result in results:
-            if not result['repository']['private']:  # 公开仓库
-                critical.append({
-                    'repository': result['repository']['full_name'],
-                    'file': result['file']['path'],
-                    'matches': result['file']['match_count'],
-                    'url': result['file']['html_url'],
-                    'reason': 'Public repository exposure'
-                })
-        
-        # 按匹配次数排序
-        critical.sort(key=lambda x: x['matches'], reverse=True)
-        return critical[:10]  # 只返回前10个
+        # 公开仓库中匹配次数最多的前10个文件
+        public_results = (r for r in results if not r['repository']['private'])
+        top_results = heapq.nlargest(10, public_results, key=lambda r: r['file']['match_count'])
+        
+        return [
+            {
+                'repository': result['repository']['full_name'],
+                'file': result['file']['path'],
+                'matches': result['file']['match_count'],
+                'url': result['file']['html_url'],
+                'reason': 'Public repository exposure'
+            }
+            for result in top_results
+        ]
     
     def _get_recommendations(self, summary: Dict) -> List[str]:
         """获取安全建议"""
@@ -444,18 +621,45 @@ class ReportGenerator:
         return recommendations
 
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成 GitHub 敏感内容搜索报告')
+    parser.add_argument(
+        '--formats',
+        default=','.join(REPORT_FORMATS),
+        help=f"要生成的报告格式，逗号分隔 (可选: {','.join(REPORT_FORMATS)}; 默认全部)"
+    )
+    parser.add_argument(
+        '--compress-json',
+        action='store_true',
+        help="将详细 JSON 报告以 gzip 压缩写入 detailed_report.json.gz"
+    )
+    args = parser.parse_args()
+    
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in REPORT_FORMATS]
+    if unknown or not formats:
+        parser.error(f"未知的报告格式: {', '.join(unknown) or '(空)'}")
+    
+    # 去重并保持顺序
+    args.formats = list(dict.fromkeys(formats))
+    return args
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     try:
-        generator = ReportGenerator()
+        generator = ReportGenerator(args.formats, compress_json=args.compress_json)
         generator.generate_all_reports()
         
         print(f"\n📁 报告文件位置:")
-        print(f"├── reports/search_results.txt     (文本格式)")
-        print(f"├── reports/detailed_report.json  (详细 JSON)")
-        print(f"├── reports/search_results.csv    (CSV 表格)")
-        print(f"├── reports/search_results.md     (Markdown)")
-        print(f"├── reports/summary.json          (摘要)")
+        for fmt in generator.formats:
+            if fmt == 'json' and generator.compress_json:
+                print(f"├── reports/detailed_report.json.gz (详细 JSON, gzip)")
+            else:
+                print(f"├── {REPORT_FORMATS[fmt]}")
         print(f"└── reports/raw_data.json         (原始数据)")
         
     except Exception as e:
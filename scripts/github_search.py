@@ -5,23 +5,55 @@ GitHub Code Search Script
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import re
+import threading
 import time
-from datetime import datetime
-from dateutil import parser
-import base64
+from datetime import datetime, timezone
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from typing import List, Dict, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from json_utils import load_json, dump_json, loads
+
+
+# 并发获取文件详情的线程数（与连接池大小匹配，避免触发 GitHub 二级速率限制）
+DETAIL_WORKERS = 8
+
+# ETag 缓存文件，放在随 Actions 缓存保存的历史目录中，跨运行复用
+ETAG_CACHE_FILE = '.github/scan_history/etag_cache.json'
+
+# 上次扫描结果索引：文件 blob sha 未变化时直接复用上次的详情记录
+PREV_INDEX_FILE = '.github/scan_history/prev_index.json'
+
+# GraphQL 接口：一次请求批量获取一页文件的提交历史
+GRAPHQL_URL = 'https://api.github.com/graphql'
+GRAPHQL_HISTORY_FIELDS = (
+    'defaultBranchRef { target { ... on Commit { history(first: 100, path: $p%(i)d) '
+    '{ totalCount nodes { oid message author { name email date } committer { name date } } } } } }'
+)
+
+# 提交记录每页条数：只用到最新 10 次提交，最早的提交通过 Link 头定位到最后一页再取
+COMMITS_PER_PAGE = 10
+
+# 文件内容以原始字节流读取，每块大小
+RAW_CHUNK_SIZE = 64 * 1024
+
+# Anthropic API Key 完整格式：sk-ant-oat01-[64位字符]
+FULL_KEY_PATTERN = re.compile(rb'sk-ant-oat01-[A-Za-z0-9_-]{64}')
+FULL_KEY_LENGTH = len('sk-ant-oat01-') + 64
+
+# 触发速率限制但响应头未给出等待时间时的默认等待秒数（GitHub 建议至少 1 分钟）
+RATE_LIMIT_FALLBACK_WAIT = 60
 
 
 class GitHubSearcher:
     def __init__(self):
         self.token = os.environ.get('GITHUB_TOKEN')
-        self.search_scope = os.environ.get('SEARCH_SCOPE', '')
-        self.max_results = int(os.environ.get('MAX_RESULTS', '100'))
-        self.search_pattern = os.environ.get('SEARCH_PATTERN', 'sk-ant-oat01-')
-        self.file_extensions = os.environ.get('FILE_EXTENSIONS', 'json').split(',')
-        self.use_regex = os.environ.get('USE_REGEX', 'true').lower() == 'true'
         
         if not self.token:
             raise ValueError("❌ GITHUB_TOKEN 未设置")
@@ -32,11 +64,347 @@ class GitHubSearcher:
             'X-GitHub-Api-Version': '2022-11-28'
         }
         
+        # 复用同一个 Session，所有 API 请求共享 keep-alive 连接池
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=1.0,
+                status_forcelist=[502, 503, 504],
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        
+        # 提交详情缓存：(仓库, sha) -> {文件名: 变更信息}，同一提交涉及多个文件时只请求一次
+        self._commit_files_cache = {}
+        
+        # 时间信息缓存：(仓库, 路径) -> 时间信息，搜索结果跨页重复出现同一文件时直接复用
+        self._time_info_cache = {}
+        self._cache_stats = Counter()
+        self._cache_stats_lock = threading.Lock()  # 详情在多个线程中并发获取，计数需加锁
+        
+        # 本次运行用到的 ETag 缓存条目（上次的缓存见 _etag_cache）
+        self._etag_used = {}
+        
+        # 本次各文件的状态与 blob sha（上次的结果索引见 _prev_index）
+        self._file_status = {}
+        self._blob_shas = {}
+        
+        # GraphQL 预取的提交历史：(仓库, 路径) -> REST 结构的提交列表
+        self._prefetched_histories = {}
+        
         # 确保报告目录存在
         os.makedirs('reports', exist_ok=True)
     
-    def build_search_query(self) -> str:
-        """构建搜索查询"""
+    @cached_property
+    def search_scope(self) -> str:
+        return os.environ.get('SEARCH_SCOPE', '')
+    
+    @cached_property
+    def max_results(self) -> int:
+        return int(os.environ.get('MAX_RESULTS', '100'))
+    
+    @cached_property
+    def search_pattern(self) -> str:
+        return os.environ.get('SEARCH_PATTERN', 'sk-ant-oat01-')
+    
+    @cached_property
+    def file_extensions(self) -> List[str]:
+        return os.environ.get('FILE_EXTENSIONS', 'json').split(',')
+    
+    @cached_property
+    def use_regex(self) -> bool:
+        return os.environ.get('USE_REGEX', 'true').lower() == 'true'
+    
+    @cached_property
+    def search_patterns(self) -> List[str]:
+        """多个搜索模式用逗号分隔"""
+        return [p.strip() for p in self.search_pattern.split(',') if p.strip()]
+    
+    @cached_property
+    def _needle_pattern(self) -> re.Pattern:
+        """所有搜索模式合并成的一个正则（长的优先），每个文件只扫一遍"""
+        needles = sorted((p.encode('utf-8') for p in self.search_patterns), key=len, reverse=True)
+        return re.compile(b'|'.join(re.escape(n) for n in needles))
+    
+    @cached_property
+    def _full_key_needles(self) -> frozenset:
+        """能由 FULL_KEY_PATTERN 校验完整密钥的搜索模式（sk-ant-oat01 开头的模式）"""
+        return frozenset(p.encode('utf-8') for p in self.search_patterns if p.startswith('sk-ant-oat01'))
+    
+    @cached_property
+    def _full_key_covered_needles(self) -> frozenset:
+        """匹配数已由完整密钥计入的搜索模式：完整密钥模式本身及其前缀（如 sk-ant-），
+        完整密钥可能被归到这些较短的模式上，再按基本匹配计数会重复"""
+        needles = {p.encode('utf-8') for p in self.search_patterns}
+        return frozenset(n for n in needles if any(f.startswith(n) for f in self._full_key_needles))
+    
+    @cached_property
+    def _needle_max_len(self) -> int:
+        return max((len(p.encode('utf-8')) for p in self.search_patterns), default=1)
+    
+    @cached_property
+    def _etag_cache(self) -> Dict:
+        """上次运行保存的 ETag 缓存：URL -> {'etag', 'data', 'last_page'}；304 响应不消耗速率限制额度"""
+        try:
+            return load_json(ETAG_CACHE_FILE)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_etag_cache(self):
+        """保存 ETag 缓存（只保留本次运行用到的条目，避免无限增长）"""
+        try:
+            os.makedirs(os.path.dirname(ETAG_CACHE_FILE), exist_ok=True)
+            dump_json(self._etag_used, ETAG_CACHE_FILE, atomic=True, indent=False)
+            print(f"💾 ETag 缓存已保存: {len(self._etag_used)} 条")
+        except OSError as e:
+            print(f"⚠️ 保存 ETag 缓存失败: {e}")
+    
+    def _index_settings(self) -> Dict:
+        """影响详情记录内容的搜索设置；设置变化时上次的索引不可复用"""
+        return {
+            'search_query': self.search_query,
+            'use_regex': self.use_regex
+        }
+    
+    @cached_property
+    def _prev_index(self) -> Dict:
+        """上次扫描的结果索引："仓库:路径" -> {'sha', 'record'}"""
+        try:
+            index_data = load_json(PREV_INDEX_FILE)
+        except (OSError, ValueError):
+            return {}
+        
+        if index_data.get('settings') != self._index_settings():
+            print("ℹ️ 搜索设置已变化，不复用上次扫描索引")
+            return {}
+        return index_data.get('files', {})
+    
+    def save_prev_index(self, results: List[Dict]):
+        """保存本次扫描的结果索引，供下次运行对比复用"""
+        files = {}
+        for result in results:
+            key = f"{result['repository']['full_name']}:{result['file']['path']}"
+            files[key] = {'sha': self._blob_shas.get(key), 'record': result}
+        
+        try:
+            os.makedirs(os.path.dirname(PREV_INDEX_FILE), exist_ok=True)
+            dump_json({'settings': self._index_settings(), 'files': files}, PREV_INDEX_FILE, atomic=True, indent=False)
+        except OSError as e:
+            print(f"⚠️ 保存扫描索引失败: {e}")
+    
+    def _previous_record(self, item: Dict) -> Optional[Dict]:
+        """文件 blob sha 与上次扫描相同时返回上次的记录"""
+        previous = self._prev_index.get(f"{item['repository']['full_name']}:{item['path']}")
+        if previous and item.get('sha') and previous.get('sha') == item['sha']:
+            return previous['record']
+        return None
+    
+    def _get_or_reuse_details(self, item: Dict) -> Optional[Dict]:
+        """文件未变化时复用上次的记录，否则重新获取详情"""
+        key = f"{item['repository']['full_name']}:{item['path']}"
+        self._blob_shas[key] = item.get('sha')
+        
+        record = self._previous_record(item)
+        if record is not None:
+            try:
+                refreshed = self._refresh_record(record, item)
+            except (KeyError, TypeError, AttributeError) as e:
+                print(f"⚠️  上次记录不可复用 {item.get('path', 'unknown')}: {e}")
+            else:
+                self._file_status[key] = 'unchanged'
+                return refreshed
+        
+        self._file_status[key] = 'modified' if key in self._prev_index else 'new'
+        return self.get_file_details(item)
+    
+    def _refresh_record(self, record: Dict, item: Dict) -> Dict:
+        """复用上次的记录：只沿用内容和提交相关的字段，
+        仓库信息（是否公开、星标等会变化）按本次搜索结果重建，文件年龄和发现时间重新计算"""
+        time_info = dict(record['time_info'])
+        time_info['file_age_days'] = self._file_age_days(time_info.get('first_commit', {}).get('first_created'))
+        return {
+            **record,
+            'repository': self._repository_info(item['repository']),
+            'time_info': time_info,
+            'found_at': datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def _repository_info(repo_info: Dict) -> Dict:
+        """从搜索结果中的仓库信息整理出记录中的 repository 字段"""
+        return {
+            'name': repo_info['name'],
+            'full_name': repo_info['full_name'],
+            'owner': repo_info['owner']['login'],
+            'html_url': repo_info['html_url'],
+            'private': repo_info['private'],
+            'description': repo_info.get('description', ''),
+            'language': repo_info.get('language', ''),
+            'stars': repo_info.get('stargazers_count', 0),
+            'forks': repo_info.get('forks_count', 0),
+            'created_at': repo_info.get('created_at'),
+            'updated_at': repo_info.get('updated_at')
+        }
+    
+    @staticmethod
+    def _file_age_days(created: Optional[str]) -> Optional[int]:
+        """根据最早提交时间计算文件年龄（天），无法解析时返回 None"""
+        try:
+            # GitHub 返回严格的 ISO 8601 时间，fromisoformat 即可解析（兼容 3.11 以前不支持的 Z 后缀）
+            created_date = datetime.fromisoformat(created.replace('Z', '+00:00'))
+            return (datetime.now(created_date.tzinfo) - created_date).days
+        except (ValueError, AttributeError):
+            return None
+    
+    def _prefetch_commit_histories(self, items: List[Dict]):
+        """用一次 GraphQL 请求批量获取一页文件的提交历史，失败的文件之后回退到 REST"""
+        targets = [
+            item for item in items
+            if self._previous_record(item) is None
+            and (item['repository']['full_name'], item['path']) not in self._time_info_cache
+        ]
+        if not targets:
+            return
+        
+        variables = {}
+        declarations = []
+        fields = []
+        for i, item in enumerate(targets):
+            owner, name = item['repository']['full_name'].split('/', 1)
+            variables.update({f'o{i}': owner, f'n{i}': name, f'p{i}': item['path']})
+            declarations.append(f'$o{i}: String!, $n{i}: String!, $p{i}: String!')
+            fields.append(f'f{i}: repository(owner: $o{i}, name: $n{i}) {{ {GRAPHQL_HISTORY_FIELDS % {"i": i}} }}')
+        query = f"query({', '.join(declarations)}) {{ {' '.join(fields)} }}"
+        
+        try:
+            response = self.session.post(GRAPHQL_URL, json={'query': query, 'variables': variables})
+            self._respect_limits(response)
+            if response.status_code != 200:
+                print(f"    ⚠️ GraphQL 批量请求失败: {response.status_code}，回退到 REST")
+                return
+            data = loads(response.content).get('data') or {}
+        except (requests.RequestException, ValueError) as e:
+            print(f"    ⚠️ GraphQL 批量请求失败: {e}，回退到 REST")
+            return
+        
+        for i, item in enumerate(targets):
+            # 任何一个文件的数据不完整（如作者账号已删除时 author 为 null）都只跳过该文件，交给 REST 回退
+            try:
+                history = data[f'f{i}']['defaultBranchRef']['target']['history']
+                nodes = history['nodes']
+                if len(nodes) < history.get('totalCount', 0):
+                    # 历史超过一批的文件交给 REST 通过最后一页取得最早提交和准确的提交数
+                    continue
+                commits = [self._graphql_commit(node) for node in nodes]
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            key = (item['repository']['full_name'], item['path'])
+            self._prefetched_histories[key] = commits
+    
+    @staticmethod
+    def _graphql_commit(node: Dict) -> Dict:
+        """把 GraphQL 提交节点转换成 REST 提交列表的结构（时间统一为 UTC）"""
+        def utc(date_str):
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        
+        author = node.get('author') or {}
+        committer = node.get('committer') or {}
+        return {
+            'sha': node['oid'],
+            'commit': {
+                'message': node['message'],
+                'author': {'name': author.get('name'), 'email': author.get('email'), 'date': utc(author.get('date'))},
+                'committer': {'name': committer.get('name'), 'date': utc(committer.get('date'))}
+            }
+        }
+    
+    @staticmethod
+    def _slim_commits(commits: List[Dict]) -> List[Dict]:
+        """REST 提交列表只保留用到的字段，减少内存和 ETag 缓存体积"""
+        slim = []
+        for commit in commits:
+            detail = commit['commit']
+            author = detail['author']
+            committer = detail['committer']
+            slim.append({
+                'sha': commit['sha'],
+                'commit': {
+                    'message': detail['message'],
+                    'author': {'name': author['name'], 'email': author['email'], 'date': author['date']},
+                    'committer': {'name': committer['name'], 'date': committer['date']}
+                }
+            })
+        return slim
+    
+    @staticmethod
+    def _slim_commit_detail(detail: Dict) -> Dict:
+        """提交详情只保留各文件的变更统计，丢弃 patch 等大字段"""
+        fields = ('filename', 'additions', 'deletions', 'changes', 'status', 'previous_filename')
+        return {'files': [{k: f[k] for k in fields if k in f} for f in detail.get('files', [])]}
+    
+    def _get_json(self, url: str, params: Optional[Dict] = None, transform=None):
+        """带 If-None-Match 的条件 GET，返回解析后的 JSON；请求失败时返回 None"""
+        return self._get_json_page(url, params, transform)[0]
+    
+    def _get_json_page(self, url: str, params: Optional[Dict] = None, transform=None):
+        """条件 GET 分页接口，返回 (JSON, Link 头中的最后一页页码)；没有分页时页码为 None
+
+        transform 在缓存之前对解析结果做裁剪，缓存和返回的都是裁剪后的数据。
+        """
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        cached = self._etag_cache.get(key)
+        headers = {'If-None-Match': cached['etag']} if cached else None
+        
+        response = self.session.get(url, params=params, headers=headers)
+        self._respect_limits(response)
+        
+        if response.status_code == 304 and cached:
+            self._etag_used[key] = cached
+            return cached['data'], cached.get('last_page')
+        if response.status_code != 200:
+            return None, None
+        
+        data = loads(response.content)
+        if transform is not None:
+            data = transform(data)
+        last_url = response.links.get('last', {}).get('url')
+        last_page = int(parse_qs(urlparse(last_url).query)['page'][0]) if last_url else None
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etag_used[key] = {'etag': etag, 'data': data, 'last_page': last_page}
+        return data, last_page
+    
+    def _rate_limit_wait(self, response) -> float:
+        """根据响应头计算触发速率限制后需要等待的秒数"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        
+        reset = response.headers.get('X-RateLimit-Reset')
+        if response.headers.get('X-RateLimit-Remaining') == '0' and reset and reset.isdigit():
+            return max(0, int(reset) - time.time())
+        
+        return RATE_LIMIT_FALLBACK_WAIT
+    
+    def _respect_limits(self, response):
+        """额度即将耗尽时等待到重置时间，而不是每次请求都固定休眠"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining and reset and remaining.isdigit() and reset.isdigit() and int(remaining) <= 1:
+            wait = max(0, int(reset) - time.time())
+            if wait:
+                print(f"⏳ 速率限制额度即将耗尽，等待 {wait:.0f} 秒后继续...")
+                time.sleep(wait)
+    
+    @cached_property
+    def search_query(self) -> str:
+        """搜索查询"""
         # 构建语言查询
         if len(self.file_extensions) == 1:
             language_query = f'language:{self.file_extensions[0]}'
@@ -47,7 +415,12 @@ class GitHubSearcher:
             if len(ext_queries) > 1:
                 language_query = f'({language_query})'
         
-        base_query = f'{self.search_pattern} {language_query}'
+        if len(self.search_patterns) > 1:
+            pattern_query = f"({' OR '.join(self.search_patterns)})"
+        else:
+            pattern_query = self.search_pattern
+        
+        base_query = f'{pattern_query} {language_query}'
         
         if self.search_scope:
             query = f'{base_query} {self.search_scope}'
@@ -58,7 +431,7 @@ class GitHubSearcher:
     
     def search_github_code(self) -> tuple[List[Dict], int]:
         """执行 GitHub 代码搜索"""
-        query = self.build_search_query()
+        query = self.search_query
         print(f"🔍 搜索查询: {query}")
         print("=" * 80)
         
@@ -79,18 +452,19 @@ class GitHubSearcher:
                     'per_page': min(per_page, self.max_results - len(results))
                 }
                 
-                response = requests.get(search_url, headers=self.headers, params=params)
+                response = self.session.get(search_url, params=params)
                 
-                if response.status_code == 403:
-                    print("⚠️  API 速率限制，等待 60 秒...")
-                    time.sleep(60)
+                if response.status_code in (403, 429):
+                    wait = self._rate_limit_wait(response)
+                    print(f"⚠️  API 速率限制，等待 {wait:.0f} 秒...")
+                    time.sleep(wait)
                     continue
                 elif response.status_code != 200:
                     print(f"❌ API 请求失败: {response.status_code}")
                     print(f"响应: {response.text}")
                     break
                 
-                data = response.json()
+                data = loads(response.content)
                 total_found = data.get('total_count', 0)
                 items = data.get('items', [])
                 
@@ -98,15 +472,17 @@ class GitHubSearcher:
                     print("✅ 没有更多结果")
                     break
                 
-                for item in items:
-                    file_info = self.get_file_details(item)
-                    if file_info:
-                        results.append(file_info)
+                # 先批量预取本页文件的提交历史，再并发获取其余详情；map 保持原有顺序
+                self._prefetch_commit_histories(items)
+                with ThreadPoolExecutor(max_workers=DETAIL_WORKERS) as executor:
+                    for file_info in executor.map(self._get_or_reuse_details, items):
+                        if file_info:
+                            results.append(file_info)
                 
                 page += 1
-                time.sleep(1)  # 避免 API 速率限制
+                self._respect_limits(response)
                 
-            except Exception as e:
+            except (requests.RequestException, ValueError) as e:
                 print(f"❌ 搜索错误: {e}")
                 break
         
@@ -114,6 +490,17 @@ class GitHubSearcher:
         print(f"总共找到: {total_found} 个结果")
         print(f"已处理: {len(results)} 个文件")
         
+        if self._prev_index:
+            statuses = list(self._file_status.values())
+            removed = sum(1 for key in self._prev_index if key not in self._file_status)
+            print(f"🔁 与上次扫描对比: 新增 {statuses.count('new')}，变更 {statuses.count('modified')}，"
+                  f"未变 {statuses.count('unchanged')}，移除 {removed}")
+        
+        stats = self._cache_stats
+        if stats['time_info_lookups'] or stats['commit_files_lookups']:
+            print(f"♻️ 缓存命中: 时间信息 {stats['time_info_hits']}/{stats['time_info_lookups']}，"
+                  f"提交详情 {stats['commit_files_hits']}/{stats['commit_files_lookups']}")
+        
         return results, total_found
     
     def get_file_details(self, item: Dict) -> Optional[Dict]:
@@ -134,19 +521,7 @@ class GitHubSearcher:
             change_info = self._get_change_info(repo_info['full_name'], file_path, time_info)
             
             return {
-                'repository': {
-                    'name': repo_info['name'],
-                    'full_name': repo_info['full_name'],
-                    'owner': repo_info['owner']['login'],
-                    'html_url': repo_info['html_url'],
-                    'private': repo_info['private'],
-                    'description': repo_info.get('description', ''),
-                    'language': repo_info.get('language', ''),
-                    'stars': repo_info.get('stargazers_count', 0),
-                    'forks': repo_info.get('forks_count', 0),
-                    'created_at': repo_info.get('created_at'),
-                    'updated_at': repo_info.get('updated_at')
-                },
+                'repository': self._repository_info(repo_info),
                 'file': {
                     'path': file_path,
                     'name': item['name'],
@@ -162,11 +537,32 @@ class GitHubSearcher:
             }
             
         except Exception as e:
+            # 单个文件出错只跳过该文件，不能让 executor.map 中的异常中断整个扫描
             print(f"⚠️  获取文件详情失败 {item.get('path', 'unknown')}: {e}")
             return None
     
+    def _count_cache(self, name: str, hit: bool):
+        """记录一次缓存查找及是否命中（线程安全）"""
+        with self._cache_stats_lock:
+            self._cache_stats[f'{name}_lookups'] += 1
+            if hit:
+                self._cache_stats[f'{name}_hits'] += 1
+    
     def _get_time_info(self, repo_full_name: str, file_path: str) -> Dict:
-        """获取文件的时间信息"""
+        """获取文件的时间信息（按 (仓库, 路径) 缓存，只缓存成功获取到提交的结果）"""
+        key = (repo_full_name, file_path)
+        cached = self._time_info_cache.get(key)
+        self._count_cache('time_info', cached is not None)
+        if cached is not None:
+            return cached
+        
+        time_info = self._fetch_time_info(repo_full_name, file_path)
+        if time_info['last_commit']:
+            self._time_info_cache[key] = time_info
+        return time_info
+    
+    def _fetch_time_info(self, repo_full_name: str, file_path: str) -> Dict:
+        """请求文件的提交记录并整理时间信息"""
         time_info = {
             'first_commit': {},
             'last_commit': {},
@@ -178,58 +574,61 @@ class GitHubSearcher:
         try:
             # 获取所有提交记录
             commits_url = f"https://api.github.com/repos/{repo_full_name}/commits"
-            params = {'path': file_path, 'per_page': 100}
+            params = {'path': file_path, 'per_page': COMMITS_PER_PAGE}
             
-            response = requests.get(commits_url, headers=self.headers, params=params)
+            # GraphQL 预取到的是完整历史；否则 REST 只取第一页，多页时再取最后一页
+            commits_data = self._prefetched_histories.pop((repo_full_name, file_path), None)
+            last_page = None
+            if commits_data is None:
+                commits_data, last_page = self._get_json_page(commits_url, params, self._slim_commits)
             
-            if response.status_code == 200:
-                commits_data = response.json()
+            if commits_data:
+                oldest_commit = commits_data[-1]
+                total_commits = len(commits_data)
+                if last_page and last_page > 1:
+                    oldest_page = self._get_json(commits_url, {**params, 'page': last_page}, self._slim_commits)
+                    if oldest_page:
+                        oldest_commit = oldest_page[-1]
+                        total_commits = (last_page - 1) * COMMITS_PER_PAGE + len(oldest_page)
                 
-                if commits_data:
-                    # 最新提交
-                    latest_commit = commits_data[0]
-                    time_info['last_commit'] = {
-                        'last_modified': latest_commit['commit']['committer']['date'],
-                        'last_commit_sha': latest_commit['sha'],
-                        'last_commit_message': self._truncate_message(latest_commit['commit']['message']),
-                        'last_author': latest_commit['commit']['author']['name'],
-                        'last_author_email': latest_commit['commit']['author']['email'],
-                        'last_committer': latest_commit['commit']['committer']['name'],
-                        'last_committer_date': latest_commit['commit']['committer']['date']
-                    }
-                    
-                    # 最早提交
-                    oldest_commit = commits_data[-1]
-                    time_info['first_commit'] = {
-                        'first_created': oldest_commit['commit']['author']['date'],
-                        'first_commit_sha': oldest_commit['sha'],
-                        'first_commit_message': self._truncate_message(oldest_commit['commit']['message']),
-                        'first_author': oldest_commit['commit']['author']['name'],
-                        'first_author_email': oldest_commit['commit']['author']['email'],
-                        'creation_committer': oldest_commit['commit']['committer']['name'],
-                        'creation_committer_date': oldest_commit['commit']['committer']['date']
-                    }
-                    
-                    # 计算文件年龄
-                    try:
-                        created_date = parser.parse(oldest_commit['commit']['author']['date'])
-                        file_age = (datetime.now(created_date.tzinfo) - created_date).days
-                        time_info['file_age_days'] = file_age
-                    except:
-                        pass
-                    
-                    # 提交历史
-                    time_info['total_commits'] = len(commits_data)
-                    for commit in commits_data[:10]:  # 前10次提交
-                        time_info['commit_history'].append({
-                            'sha': commit['sha'][:8],
-                            'date': commit['commit']['author']['date'],
-                            'author': commit['commit']['author']['name'],
-                            'message': self._truncate_message(commit['commit']['message'], 50),
-                            'committer_date': commit['commit']['committer']['date']
-                        })
+                # 最新提交
+                latest_commit = commits_data[0]
+                time_info['last_commit'] = {
+                    'last_modified': latest_commit['commit']['committer']['date'],
+                    'last_commit_sha': latest_commit['sha'],
+                    'last_commit_message': self._truncate_message(latest_commit['commit']['message']),
+                    'last_author': latest_commit['commit']['author']['name'],
+                    'last_author_email': latest_commit['commit']['author']['email'],
+                    'last_committer': latest_commit['commit']['committer']['name'],
+                    'last_committer_date': latest_commit['commit']['committer']['date']
+                }
+                
+                # 最早提交
+                time_info['first_commit'] = {
+                    'first_created': oldest_commit['commit']['author']['date'],
+                    'first_commit_sha': oldest_commit['sha'],
+                    'first_commit_message': self._truncate_message(oldest_commit['commit']['message']),
+                    'first_author': oldest_commit['commit']['author']['name'],
+                    'first_author_email': oldest_commit['commit']['author']['email'],
+                    'creation_committer': oldest_commit['commit']['committer']['name'],
+                    'creation_committer_date': oldest_commit['commit']['committer']['date']
+                }
+                
+                # 计算文件年龄
+                time_info['file_age_days'] = self._file_age_days(oldest_commit['commit']['author']['date'])
+                
+                # 提交历史
+                time_info['total_commits'] = total_commits
+                for commit in commits_data[:10]:  # 前10次提交
+                    time_info['commit_history'].append({
+                        'sha': commit['sha'][:8],
+                        'date': commit['commit']['author']['date'],
+                        'author': commit['commit']['author']['name'],
+                        'message': self._truncate_message(commit['commit']['message'], 50),
+                        'committer_date': commit['commit']['committer']['date']
+                    })
         
-        except Exception as e:
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
             print(f"    ⚠️ 获取时间信息失败: {e}")
         
         return time_info
@@ -239,45 +638,98 @@ class GitHubSearcher:
         content_info = {'size': 0, 'match_count': 0, 'full_keys': []}
         
         try:
+            # 直接请求原始内容并流式扫描，省去 JSON 解析、Base64 解码和 UTF-8 解码
             content_url = item['url']
-            response = requests.get(content_url, headers=self.headers)
             
-            if response.status_code == 200:
-                content_data = response.json()
-                content_info['size'] = content_data.get('size', 0)
+            with self.session.get(content_url, headers={'Accept': 'application/vnd.github.raw'}, stream=True) as response:
+                self._respect_limits(response)
                 
-                if content_data.get('content'):
-                    try:
-                        decoded_content = base64.b64decode(content_data['content']).decode('utf-8')
+                if response.status_code == 200:
+                    size, (basic_matches, full_keys) = self._scan_stream(
+                        response.iter_content(RAW_CHUNK_SIZE),
+                        [self._needle_pattern, FULL_KEY_PATTERN],
+                        max(self._needle_max_len, FULL_KEY_LENGTH)
+                    )
+                    content_info['size'] = size
+                    
+                    if len(self.search_patterns) > 1 and basic_matches:
+                        per_pattern = Counter(m.decode('utf-8') for m in basic_matches)
+                        print(f"    🔎 各模式匹配: {dict(per_pattern)}")
+                    
+                    if self.use_regex:
+                        # 使用正则表达式匹配完整的 Anthropic API Key；完整密钥正则只覆盖 sk-ant-oat01- 格式，
+                        # 其他模式没有可校验的完整格式，按基本匹配计数，避免这些文件的匹配数为 0
+                        other_matches = sum(1 for m in basic_matches if m not in self._full_key_covered_needles)
+                        content_info['match_count'] = (len(full_keys) if self._full_key_needles else 0) + other_matches
+                        content_info['full_keys'] = [key.decode('ascii') for key in full_keys[:5]]  # 只保存前5个，避免泄露太多
                         
-                        if self.use_regex:
-                            # 使用正则表达式匹配完整的 Anthropic API Key
-                            import re
-                            
-                            # Anthropic API Key 完整格式：sk-ant-oat01-[64位字符]
-                            anthropic_pattern = r'sk-ant-oat01-[A-Za-z0-9_-]{64}'
-                            
-                            matches = re.findall(anthropic_pattern, decoded_content)
-                            content_info['match_count'] = len(matches)
-                            content_info['full_keys'] = matches[:5]  # 只保存前5个，避免泄露太多
-                            
-                            # 同时检查基本模式
-                            basic_matches = decoded_content.count(self.search_pattern)
-                            if basic_matches > content_info['match_count']:
-                                print(f"    📊 发现 {basic_matches} 个基本匹配，{content_info['match_count']} 个完整密钥")
-                        else:
-                            # 基本字符串匹配
-                            content_info['match_count'] = decoded_content.count(self.search_pattern)
-                            
-                    except Exception as e:
-                        print(f"    ⚠️ 内容解析失败: {e}")
-                        pass
+                        # 同时检查基本模式
+                        if len(basic_matches) > content_info['match_count']:
+                            print(f"    📊 发现 {len(basic_matches)} 个基本匹配，{content_info['match_count']} 个完整密钥")
+                    else:
+                        # 基本字符串匹配
+                        content_info['match_count'] = len(basic_matches)
         
-        except Exception as e:
+        except requests.RequestException as e:
             print(f"    ⚠️ 获取内容信息失败: {e}")
         
         return content_info
     
+    @staticmethod
+    def _scan_stream(chunks, patterns: List[re.Pattern], max_match_len: int):
+        """流式扫描字节块，返回 (总字节数, 各模式的匹配列表)
+
+        一个匹配只有在从起点往后 max_match_len 字节都已读到（或内容已结束）时才被接受；
+        否则可能只看到较长模式的一部分而误取较短的模式（如 sk-ant- 与 sk-ant-oat01-），
+        这样的匹配连同其后的字节留到下一块再判断。结果与对完整内容执行 findall 完全一致，
+        内存占用只与块大小有关。
+
+        跨块边界时较长模式优先的回归检查（python -m doctest scripts/github_search.py）：
+
+        >>> needles = re.compile(rb'sk-ant-oat01-|sk-ant-')
+        >>> data = b'x' * 7 + b'sk-ant-oat01-' + b'A' * 64 + b' sk-ant-'
+        >>> chunks = [data[i:i + 10] for i in range(0, len(data), 10)]
+        >>> size, found = GitHubSearcher._scan_stream(chunks, [needles, FULL_KEY_PATTERN], FULL_KEY_LENGTH)
+        >>> found == [needles.findall(data), FULL_KEY_PATTERN.findall(data)]
+        True
+        >>> found[0]
+        [b'sk-ant-oat01-', b'sk-ant-']
+        """
+        matches = [[] for _ in patterns]
+        resume = [0] * len(patterns)  # 各模式下次开始查找的位置（完整内容中的偏移）
+        
+        def scan(buf, offset, final):
+            limit = len(buf) - max_match_len  # 起点不超过 limit 的匹配在 buf 中完整可见
+            for i, pattern in enumerate(patterns):
+                for match in pattern.finditer(buf, resume[i] - offset):
+                    if not final and match.start() > limit:
+                        # 匹配可能还没读完整；limit 之后的位置此前也可能只看到较长模式的一部分，
+                        # 从两者中较早的位置开始留到下一块
+                        resume[i] = max(resume[i], offset + min(match.start(), limit + 1))
+                        break
+                    matches[i].append(match.group())
+                    resume[i] = offset + match.end()
+                else:
+                    if not final:
+                        resume[i] = max(resume[i], offset + limit + 1)
+        
+        tail = b''
+        offset = 0  # tail 在完整内容中的起始位置
+        size = 0
+        
+        for chunk in chunks:
+            size += len(chunk)
+            buf = tail + chunk
+            scan(buf, offset, False)
+            
+            # 只保留还没判断完的部分（长度小于 max_match_len）
+            keep_from = min(resume, default=offset + len(buf)) - offset
+            tail = buf[keep_from:]
+            offset += keep_from
+        
+        scan(tail, offset, True)
+        return size, matches
+    
     def _get_change_info(self, repo_full_name: str, file_path: str, time_info: Dict) -> Dict:
         """获取文件变更信息"""
         change_info = {}
@@ -285,29 +737,40 @@ class GitHubSearcher:
         try:
             last_commit_sha = time_info.get('last_commit', {}).get('last_commit_sha')
             if last_commit_sha:
-                commit_url = f"https://api.github.com/repos/{repo_full_name}/commits/{last_commit_sha}"
-                response = requests.get(commit_url, headers=self.headers)
+                file_change = self._get_commit_files(repo_full_name, last_commit_sha).get(file_path)
                 
-                if response.status_code == 200:
-                    commit_detail = response.json()
-                    files_changed = commit_detail.get('files', [])
-                    
-                    for file_change in files_changed:
-                        if file_change.get('filename') == file_path:
-                            change_info = {
-                                'additions': file_change.get('additions', 0),
-                                'deletions': file_change.get('deletions', 0),
-                                'changes': file_change.get('changes', 0),
-                                'status': file_change.get('status', 'unknown'),
-                                'previous_filename': file_change.get('previous_filename')
-                            }
-                            break
+                if file_change:
+                    change_info = {
+                        'additions': file_change.get('additions', 0),
+                        'deletions': file_change.get('deletions', 0),
+                        'changes': file_change.get('changes', 0),
+                        'status': file_change.get('status', 'unknown'),
+                        'previous_filename': file_change.get('previous_filename')
+                    }
         
-        except Exception as e:
+        except (requests.RequestException, ValueError, AttributeError, TypeError, KeyError) as e:
             print(f"    ⚠️ 获取变更信息失败: {e}")
         
         return change_info
     
+    def _get_commit_files(self, repo_full_name: str, sha: str) -> Dict:
+        """获取提交中变更的文件（按 (仓库, sha) 缓存）"""
+        key = (repo_full_name, sha)
+        cached = self._commit_files_cache.get(key)
+        self._count_cache('commit_files', cached is not None)
+        if cached is not None:
+            return cached
+        
+        commit_url = f"https://api.github.com/repos/{repo_full_name}/commits/{sha}"
+        commit_detail = self._get_json(commit_url, transform=self._slim_commit_detail)
+        
+        if commit_detail is None:
+            return {}
+        
+        files = {f.get('filename'): f for f in commit_detail.get('files', [])}
+        self._commit_files_cache[key] = files
+        return files
+    
     def _truncate_message(self, message: str, max_length: int = 100) -> str:
         """截断提交消息"""
         if len(message) > max_length:
@@ -318,7 +781,7 @@ class GitHubSearcher:
         """保存原始数据"""
         raw_data = {
             'scan_time': datetime.now().isoformat(),
-            'search_query': self.build_search_query(),
+            'search_query': self.search_query,
             'search_pattern': self.search_pattern,
             'file_extensions': self.file_extensions,
             'use_regex': self.use_regex,  # 记录是否使用了正则匹配
@@ -328,8 +791,7 @@ class GitHubSearcher:
             'results': results
         }
         
-        with open('reports/raw_data.json', 'w', encoding='utf-8') as f:
-            json.dump(raw_data, f, indent=2, ensure_ascii=False)
+        dump_json(raw_data, 'reports/raw_data.json')
         
         print(f"💾 原始数据已保存到 reports/raw_data.json")
 
@@ -344,12 +806,22 @@ def main():
         
         print(f"\n💾 保存原始数据...")
         searcher.save_raw_data(results, total_found)
+        searcher.save_etag_cache()
+        searcher.save_prev_index(results)
         
         print(f"\n✅ 搜索完成！")
         if results:
+            # 一次遍历同时统计涉及的仓库和公开仓库中的文件数
+            repositories = set()
+            public_count = 0
+            for result in results:
+                repository = result['repository']
+                repositories.add(repository['full_name'])
+                if not repository['private']:
+                    public_count += 1
+            
             print(f"⚠️  发现 {len(results)} 个文件包含敏感内容")
-            print(f"🔍 涉及 {len(set(r['repository']['full_name'] for r in results))} 个仓库")
-            public_count = sum(1 for r in results if not r['repository']['private'])
+            print(f"🔍 涉及 {len(repositories)} 个仓库")
             if public_count > 0:
                 print(f"🚨 警告: {public_count} 个文件在公开仓库中!")
         else:
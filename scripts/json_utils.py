@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+JSON 读写工具
+优先使用 orjson（可选依赖），未安装时回退到标准库 json
+"""
+
+import gzip
+import json
+import mmap
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 超过该大小的文件通过 mmap 交给 orjson 解析，避免额外复制一份完整的 bytes
+MMAP_MIN_SIZE = 1 << 20
+
+
+def load_json(path: str):
+    """读取 JSON 文件"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+                return orjson.loads(f.read())
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as buf:
+                    return orjson.loads(buf)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def loads(data):
+    """解析 JSON 字节串（如 HTTP 响应体 response.content）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_text_atomic(path: str, data):
+    """原子写入文件：先写入同目录下的临时文件，再用 os.replace 替换
+
+    data 为 str 时按 UTF-8 写入，也可以直接传入 bytes。
+    读取方不会看到写了一半的文件。
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _encode_json(data, indent: bool) -> bytes:
+    """序列化为 UTF-8 字节"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0))
+
+    format_args = {'indent': 2} if indent else {'separators': (',', ':')}
+    return json.dumps(data, ensure_ascii=False, **format_args).encode('utf-8')
+
+
+def dump_json(data, path: str, compress: bool = False, atomic: bool = False, indent: bool = True):
+    """写入 JSON 文件（UTF-8，缩进 2 格）；compress=True 时以 gzip 压缩写入
+
+    indent=False 时写入不带空白的紧凑格式，适合只由程序读取的文件。
+    atomic=True 时通过 write_text_atomic 整体替换目标文件。
+    """
+    if atomic:
+        payload = _encode_json(data, indent)
+        write_text_atomic(path, gzip.compress(payload) if compress else payload)
+        return
+
+    if orjson is not None:
+        with (gzip.open(path, 'wb') if compress else open(path, 'wb')) as f:
+            f.write(_encode_json(data, indent))
+        return
+
+    # 标准库回退时直接流式写入，不必先拼出完整字符串
+    format_args = {'indent': 2} if indent else {'separators': (',', ':')}
+    with (gzip.open(path, 'wt', encoding='utf-8') if compress else open(path, 'w', encoding='utf-8')) as f:
+        json.dump(data, f, ensure_ascii=False, **format_args)
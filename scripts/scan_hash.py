@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+扫描结果哈希
+check_new_findings.py 与 update_scan_history.py 共用，保证两边算出的哈希可以直接比较
+"""
+
+import hashlib
+import json
+from operator import itemgetter
+
+
+def results_hash(results):
+    """计算扫描结果的哈希值
+
+    只取 (仓库, 文件, 匹配数, 最后修改时间)，按仓库和文件路径排序，
+    与扫描时间等每次都会变化的字段无关，结果不变时哈希也不变。
+    """
+    key_data = sorted(
+        (
+            (
+                result['repository']['full_name'],
+                result['file']['path'],
+                result['file']['match_count'],
+                result.get('time_info', {}).get('last_commit', {}).get('last_modified', '')
+            )
+            for result in results
+        ),
+        key=itemgetter(0, 1)  # 只按仓库和路径排序，相同时保持原有顺序
+    )
+
+    # 哈希只用于判断结果是否变化，不需要密码学强度，用比 SHA-256 更快的 BLAKE2b；
+    # digest_size=32 使十六进制长度仍为 64，与原有哈希文件格式一致。
+    # 每条记录直接以规范字节形式送入哈希：字段间用 \x1f（单元分隔符），记录间用 \x1e（记录分隔符），
+    # 不再为每条记录构建字典并序列化
+    h = hashlib.blake2b(digest_size=32)
+    for repo, path, matches, last_modified in key_data:
+        h.update(f"{repo}\x1f{path}\x1f{matches}\x1f{last_modified}\x1e".encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+
+def legacy_results_hash(results):
+    """按旧格式（SHA-256 + json.dumps）计算扫描结果的哈希值
+
+    仅用于迁移：last_scan_hash.txt 中仍是旧格式哈希时，与本次结果的旧格式哈希比较，
+    相同则说明结果未变化，不应因哈希格式变化而误报新发现。
+    """
+    key_data = [
+        {
+            'repo': result['repository']['full_name'],
+            'file': result['file']['path'],
+            'matches': result['file']['match_count'],
+            'last_modified': result.get('time_info', {}).get('last_commit', {}).get('last_modified', '')
+        }
+        for result in results
+    ]
+    key_data.sort(key=lambda x: (x['repo'], x['file']))
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
@@ -4,11 +4,53 @@ Bark 通知脚本
 当发现新的敏感内容时发送 Bark 通知
 """
 
+import heapq
+from itertools import islice
 import json
 import os
 import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
 from urllib.parse import quote
+from dateutil import parser
+
+from json_utils import load_json, dump_json
+
+# 北京时间是 UTC+8
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+# 时间差显示单位（秒数, 后缀），从大到小排列；月按 30 天、年按 365 天计
+TIME_AGO_UNITS = (
+    (365 * 86400, "年前"),
+    (30 * 86400, "个月前"),
+    (7 * 86400, "周前"),
+    (86400, "天前"),
+    (3600, "小时前"),
+    (60, "分钟前"),
+)
+
+# 备用发送时精简消息需要保留的关键行
+SHORT_MESSAGE_KEYWORDS = ('扫描时间', '风险等级', '总文件数', '公开仓库', '警告')
+
+# 风险等级 -> (Bark 通知级别, 提示音)；风险等级形如 "🚨 CRITICAL"，按最后的关键字查找
+LEVEL_MAP = {
+    'CRITICAL': ('critical', 'alarm'),
+    'HIGH': ('active', 'multiwayinvitation'),
+    'MEDIUM': ('active', 'newmail'),
+}
+DEFAULT_LEVEL = ('active', 'birdsong')
+
+# 通知中最多列出的仓库数
+REPO_DISPLAY_LIMIT = 5
+
+# github_search.py 生成的每条结果都带有这三个字段，一次取出
+RESULT_FIELDS = itemgetter('file', 'repository', 'time_info')
+
+# 多个接收方时的最大并发发送数（与连接池大小匹配）
+SEND_WORKERS = 4
 
 
 class BarkNotifier:
@@ -16,24 +58,53 @@ class BarkNotifier:
         self.bark_key = os.environ.get('BARK_KEY')
         self.bark_server = os.environ.get('BARK_SERVER', 'https://api.day.app')
         
-        if not self.bark_key:
+        # BARK_KEY 可以用逗号分隔多个接收方
+        self.bark_keys = [key.strip() for key in (self.bark_key or '').split(',') if key.strip()]
+        if not self.bark_keys:
             raise ValueError("❌ BARK_KEY 环境变量未设置")
         
         # 确保服务器地址格式正确
         if not self.bark_server.startswith('http'):
             self.bark_server = f'https://{self.bark_server}'
+        self.bark_server = self.bark_server.rstrip('/')
+        
+        # 每个接收方的推送地址和请求数据中固定不变的部分只构建一次
+        self._base_urls = [f"{self.bark_server}/{key}" for key in self.bark_keys]
+        self._payload_template = {
+            'group': 'GitHub安全扫描',
+            'icon': 'https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png'
+        }
+        
+        # 复用同一个 Session，主请求与备用请求共享 keep-alive 连接
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'bark-notifier/1.0'})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=10,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         print(f"📱 Bark 服务器: {self.bark_server}")
-        print(f"🔑 Bark Key: {self.bark_key[:8]}...")
+        for key in self.bark_keys:
+            print(f"🔑 Bark Key: {key[:8]}...")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """关闭 Session，释放连接池"""
+        self.session.close()
     
     def load_findings_data(self):
         """加载发现数据"""
         try:
-            with open('reports/new_findings_check.json', 'r', encoding='utf-8') as f:
-                check_data = json.load(f)
-            
-            with open('reports/raw_data.json', 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
+            check_data = load_json('reports/new_findings_check.json')
+            raw_data = load_json('reports/raw_data.json')
             
             return check_data, raw_data
             
@@ -64,16 +135,21 @@ class BarkNotifier:
         else:
             title = "✅ GitHub 安全扫描 - 无新发现"
         
-        # 构建消息体
-        message_parts = []
-        
-        # 扫描概要
+        # 构建消息体：各段先组成列表，最后一次 join
         scan_time = datetime.fromisoformat(analysis.get('scan_time', '')).strftime('%Y-%m-%d %H:%M')
-        message_parts.append(f"⏰ 扫描时间: {scan_time}")
-        message_parts.append(f"🎯 风险等级: {risk_level}")
+        message_parts = [
+            f"⏰ 扫描时间: {scan_time}",
+            f"🎯 风险等级: {risk_level}",
+        ]
         
         if total_files > 0:
-            message_parts.append(f"📊 发现统计:")
+            # 一次遍历结果，同时得到完整密钥统计和最新文件信息
+            complete_keys_info, latest_files_info = self._summarize(raw_data)
+            total_complete_keys = complete_keys_info['total_complete_keys']
+            public_complete_keys = complete_keys_info['public_complete_keys']
+            
+            # 发现统计
+            message_parts.append("📊 发现统计:")
             message_parts.append(f"  • 总文件数: {total_files}")
             if public_files > 0:
                 message_parts.append(f"  • 🌐 公开仓库: {public_files} 个")
@@ -82,34 +158,30 @@ class BarkNotifier:
             message_parts.append(f"  • 总匹配次数: {total_matches}")
             
             # 完整密钥统计
-            complete_keys_info = self._get_complete_keys_info(raw_data)
-            if complete_keys_info['total_complete_keys'] > 0:
-                message_parts.append(f"  • 🔑 完整密钥: {complete_keys_info['total_complete_keys']} 个")
-                if complete_keys_info['public_complete_keys'] > 0:
-                    message_parts.append(f"  • ⚠️ 公开仓库中的完整密钥: {complete_keys_info['public_complete_keys']} 个")
+            if total_complete_keys > 0:
+                message_parts.append(f"  • 🔑 完整密钥: {total_complete_keys} 个")
+                if public_complete_keys > 0:
+                    message_parts.append(f"  • ⚠️ 公开仓库中的完整密钥: {public_complete_keys} 个")
             
             # 最新文件信息
-            latest_files_info = self._get_latest_files_info(raw_data)
             if latest_files_info:
-                message_parts.append(f"\n📄 最新发现文件:")
-                for file_info in latest_files_info:
-                    message_parts.append(f"  • {file_info}")
+                message_parts.append("\n📄 最新发现文件:")
+                message_parts += [f"  • {file_info}" for file_info in latest_files_info]
             
-            # 涉及的仓库
+            # 涉及的仓库，只显示前几个，不复制列表
             repositories = analysis.get('repositories', [])
             if repositories:
                 message_parts.append(f"\n📋 涉及仓库 ({len(repositories)}个):")
-                for repo in repositories[:5]:  # 只显示前5个
-                    message_parts.append(f"  • {repo}")
-                if len(repositories) > 5:
-                    message_parts.append(f"  • ... 还有 {len(repositories) - 5} 个仓库")
+                message_parts += [f"  • {repo}" for repo in islice(repositories, REPO_DISPLAY_LIMIT)]
+                if len(repositories) > REPO_DISPLAY_LIMIT:
+                    message_parts.append(f"  • ... 还有 {len(repositories) - REPO_DISPLAY_LIMIT} 个仓库")
             
             # 风险提醒
             if public_files > 0:
-                message_parts.append(f"\n⚠️ 警告: 在公开仓库中发现敏感内容!")
-                if complete_keys_info['public_complete_keys'] > 0:
-                    message_parts.append(f"🚨 发现 {complete_keys_info['public_complete_keys']} 个完整API密钥在公开仓库!")
-                message_parts.append(f"请立即检查并采取行动!")
+                message_parts.append("\n⚠️ 警告: 在公开仓库中发现敏感内容!")
+                if public_complete_keys > 0:
+                    message_parts.append(f"🚨 发现 {public_complete_keys} 个完整API密钥在公开仓库!")
+                message_parts.append("请立即检查并采取行动!")
         else:
             message_parts.append("✅ 本次扫描未发现新的敏感内容")
         
@@ -122,128 +194,118 @@ class BarkNotifier:
         
         message = '\n'.join(message_parts)
         
-        return title, message
+        return title, message, risk_level
     
-    def _get_complete_keys_info(self, raw_data):
-        """获取完整密钥信息"""
-        try:
-            results = raw_data.get('results', [])
-            total_complete_keys = 0
-            public_complete_keys = 0
-            
-            for result in results:
-                file_info = result.get('file', {})
+    def _summarize(self, raw_data):
+        """一次遍历结果，同时统计完整密钥数量并选出最近修改的 3 个文件"""
+        total_complete_keys = 0
+        public_complete_keys = 0
+        latest = []  # 最小堆，元素为 (修改时间, -序号, 结果)，只保留最新的 3 个；-序号 保证同一时间先出现的优先
+        
+        for index, result in enumerate(raw_data.get('results', [])):
+            # 单条记录格式异常时只跳过该记录，不影响其余记录的统计
+            try:
+                file_info, repository, time_info = RESULT_FIELDS(result)
                 complete_keys = file_info.get('full_keys_found', 0)
-                is_public = not result.get('repository', {}).get('private', True)
-                
-                total_complete_keys += complete_keys
-                if is_public and complete_keys > 0:
-                    public_complete_keys += complete_keys
+                is_public = not repository.get('private', True)
+                last_modified = time_info.get('last_commit', {}).get('last_modified')
+                public_keys = complete_keys if is_public and complete_keys > 0 else 0
+            except (KeyError, TypeError, AttributeError) as e:
+                print(f"⚠️ 跳过格式异常的结果记录 #{index}: {e}")
+                continue
             
-            return {
-                'total_complete_keys': total_complete_keys,
-                'public_complete_keys': public_complete_keys
-            }
-        except Exception as e:
-            print(f"⚠️ 获取完整密钥信息失败: {e}")
-            return {'total_complete_keys': 0, 'public_complete_keys': 0}
-    
-    def _get_latest_files_info(self, raw_data):
-        """获取最新文件信息"""
-        try:
-            results = raw_data.get('results', [])
-            if not results:
-                return []
+            # 完整密钥统计
+            total_complete_keys += complete_keys
+            public_complete_keys += public_keys
             
-            # 按最后修改时间排序，获取最新的文件
-            files_with_time = []
+            # 按最后修改时间保留最新的文件
+            if not last_modified:
+                continue
             
-            for result in results:
-                time_info = result.get('time_info', {})
-                last_commit = time_info.get('last_commit', {})
-                last_modified = last_commit.get('last_modified')
-                
-                if last_modified:
-                    try:
-                        # 解析时间
-                        from dateutil import parser
-                        mod_time = parser.parse(last_modified)
-                        
-                        # 处理时区转换
-                        mod_time_beijing, time_ago = self._calculate_time_diff(mod_time)
-                        
-                        # 用于显示的时间字符串（北京时间）
-                        display_time = mod_time_beijing.strftime('%m-%d %H:%M')
-                        
-                        file_info = {
-                            'repo': result['repository']['full_name'],
-                            'file': result['file']['path'],
-                            'matches': result['file']['match_count'],
-                            'last_modified': mod_time_beijing,
-                            'last_modified_str': display_time,
-                            'time_ago': time_ago,
-                            'is_public': not result['repository']['private'],
-                            'author': last_commit.get('last_author', 'Unknown')
-                        }
-                        files_with_time.append(file_info)
-                    except Exception as e:
-                        print(f"⚠️ 处理时间信息失败 {last_modified}: {e}")
-                        continue
-            
-            # 按时间排序，最新的在前
-            files_with_time.sort(key=lambda x: x['last_modified'], reverse=True)
-            
-            # 格式化输出，只显示前3个最新的文件
-            latest_files = []
-            for file_info in files_with_time[:3]:
-                repo_indicator = "🌐" if file_info['is_public'] else "🔒"
-                file_display = f"{repo_indicator} {file_info['repo']}/{file_info['file']}"
-                time_display = f"({file_info['last_modified_str']}, {file_info['time_ago']})"
-                
-                # 显示匹配信息
-                if file_info.get('has_complete_keys', False):
-                    match_display = f"[🔑{file_info.get('full_keys_found', 0)}完整+{file_info['matches']}总计]"
-                else:
-                    match_display = f"[{file_info['matches']}次]"
-                
-                # 限制长度以适合通知
-                if len(file_display) > 40:
-                    parts = file_info['file'].split('/')
-                    filename = parts[-1]
-                    file_display = f"{repo_indicator} {file_info['repo']}/.../{filename}"
+            try:
+                # GitHub 返回严格的 ISO-8601 时间，fromisoformat 直接解析；不规范的输入再交给 dateutil
+                mod_time = datetime.fromisoformat(last_modified.replace('Z', '+00:00'))
+            except (ValueError, AttributeError, TypeError):
+                try:
+                    mod_time = parser.parse(last_modified)
+                except (ValueError, OverflowError, TypeError) as e:
+                    print(f"⚠️ 处理时间信息失败 {last_modified}: {e}")
+                    continue
+            
+            # 没有时区信息时按 UTC 处理，与 _calculate_time_diff 一致
+            if mod_time.tzinfo is None:
+                mod_time = mod_time.replace(tzinfo=timezone.utc)
+            
+            entry = (mod_time, -index, result)
+            if len(latest) < 3:
+                heapq.heappush(latest, entry)
+            else:
+                heapq.heappushpop(latest, entry)
+        
+        complete_keys_info = {
+            'total_complete_keys': total_complete_keys,
+            'public_complete_keys': public_complete_keys
+        }
+        
+        # 按时间排序，最新的在前
+        latest.sort(reverse=True)
+        return complete_keys_info, self._format_latest_files(latest)
+    
+    def _format_latest_files(self, latest):
+        """格式化最新文件信息，latest 为按时间从新到旧排列的 (修改时间, -序号, 结果)"""
+        latest_files = []
+        # 当前北京时间只取一次，所有文件共用
+        now_beijing = datetime.now(BEIJING_TZ)
+        for mod_time, _, result in latest:
+            try:
+                # 处理时区转换
+                mod_time_beijing, time_ago = self._calculate_time_diff(mod_time, now_beijing)
                 
-                latest_files.append(f"{file_display} {time_display} {match_display}")
+                file_info = {
+                    'repo': result['repository']['full_name'],
+                    'file': result['file']['path'],
+                    'matches': result['file']['match_count'],
+                    'last_modified_str': mod_time_beijing.strftime('%m-%d %H:%M'),  # 北京时间
+                    'time_ago': time_ago,
+                    'is_public': not result['repository']['private']
+                }
+            except (KeyError, TypeError) as e:
+                print(f"⚠️ 获取最新文件信息失败: {e}")
+                continue
+            
+            repo_indicator = "🌐" if file_info['is_public'] else "🔒"
+            file_display = f"{repo_indicator} {file_info['repo']}/{file_info['file']}"
+            time_display = f"({file_info['last_modified_str']}, {file_info['time_ago']})"
+            
+            # 显示匹配信息
+            if file_info.get('has_complete_keys', False):
+                match_display = f"[🔑{file_info.get('full_keys_found', 0)}完整+{file_info['matches']}总计]"
+            else:
+                match_display = f"[{file_info['matches']}次]"
             
-            return latest_files
+            # 限制长度以适合通知
+            if len(file_display) > 40:
+                parts = file_info['file'].split('/')
+                filename = parts[-1]
+                file_display = f"{repo_indicator} {file_info['repo']}/.../{filename}"
             
-        except Exception as e:
-            print(f"⚠️ 获取最新文件信息失败: {e}")
-            return []
+            latest_files.append(f"{file_display} {time_display} {match_display}")
+        
+        return latest_files
     
-    def _calculate_time_diff(self, mod_time):
-        """计算时间差，正确处理时区"""
+    def _calculate_time_diff(self, mod_time, now_beijing):
+        """计算时间差，正确处理时区（now_beijing 为调用方预先取好的当前北京时间）"""
         try:
-            from datetime import timezone, timedelta
-            
-            # 北京时间是 UTC+8
-            beijing_offset = timedelta(hours=8)
-            beijing_tz = timezone(beijing_offset)
-            
-            # 获取当前北京时间
-            current_beijing = datetime.now(beijing_tz)
-            
             # 处理修改时间的时区
             if mod_time.tzinfo is not None:
                 # 如果有时区信息，转换为北京时间
-                mod_time_beijing = mod_time.astimezone(beijing_tz)
+                mod_time_beijing = mod_time.astimezone(BEIJING_TZ)
             else:
                 # 如果没有时区信息，假设是UTC时间
-                utc_tz = timezone.utc
-                mod_time_utc = mod_time.replace(tzinfo=utc_tz)
-                mod_time_beijing = mod_time_utc.astimezone(beijing_tz)
+                mod_time_beijing = mod_time.replace(tzinfo=timezone.utc).astimezone(BEIJING_TZ)
             
             # 计算时间差
-            time_diff = current_beijing - mod_time_beijing
+            time_diff = now_beijing - mod_time_beijing
             time_ago = self._format_time_ago(time_diff)
             
             return mod_time_beijing, time_ago
@@ -274,69 +336,56 @@ class BarkNotifier:
         if total_seconds < 0:
             return "刚刚"
         
-        # 计算各种时间单位
-        minutes = total_seconds // 60
-        hours = minutes // 60
-        days = hours // 24
-        weeks = days // 7
-        months = days // 30
-        years = days // 365
-        
-        if years > 0:
-            return f"{years}年前"
-        elif months > 0:
-            return f"{months}个月前"
-        elif weeks > 0:
-            return f"{weeks}周前"
-        elif days > 0:
-            return f"{days}天前"
-        elif hours > 0:
-            return f"{hours}小时前"
-        elif minutes > 0:
-            return f"{minutes}分钟前"
-        else:
-            return "刚刚"
+        # 从最大的单位开始，取第一个不为 0 的
+        for unit_seconds, suffix in TIME_AGO_UNITS:
+            count = total_seconds // unit_seconds
+            if count:
+                return f"{count}{suffix}"
+        
+        return "刚刚"
     
-    def send_notification(self, title, message, level="active"):
-        """发送 Bark 通知"""
+    def send_notification(self, title, message, risk_level="UNKNOWN"):
+        """发送 Bark 通知（多个接收方时并发发送，任一成功即视为成功）"""
+        # 根据风险等级设置通知级别和声音，标题中的告警标记可以提升级别
+        severity = risk_level.split()[-1] if risk_level else ''
+        if "🚨" in title:
+            severity = 'CRITICAL'
+        elif "⚠️" in title and severity != 'CRITICAL':
+            severity = 'HIGH'
+        level, sound = LEVEL_MAP.get(severity, DEFAULT_LEVEL)
+        
+        # 构建请求数据
+        data = {
+            'title': title,
+            'body': message,
+            'level': level,
+            'sound': sound,
+            **self._payload_template
+        }
+        
+        print(f"📤 发送 Bark 通知...")
+        print(f"📋 数据: {{'title': '{title[:30]}...', 'level': '{level}', 'sound': '{sound}'}}")
+        
+        if len(self._base_urls) == 1:
+            return self._send_to_key(self._base_urls[0], data)
+        
+        # 多个接收方共享同一个 Session 的连接池并发发送
+        with ThreadPoolExecutor(max_workers=min(SEND_WORKERS, len(self._base_urls))) as executor:
+            results = list(executor.map(lambda base_url: self._send_to_key(base_url, data), self._base_urls))
+        
+        print(f"📨 发送完成: {sum(results)}/{len(results)} 个接收方成功")
+        return any(results)
+    
+    def _send_to_key(self, base_url, data):
+        """向单个 Bark Key 发送通知（base_url 为 服务器/Key），失败时尝试备用方法"""
+        title, message, level, sound = data['title'], data['body'], data['level'], data['sound']
         try:
-            # 根据风险等级设置通知级别和声音
-            if "CRITICAL" in message or "🚨" in title:
-                level = "critical"
-                sound = "alarm"
-            elif "HIGH" in message or "⚠️" in title:
-                level = "active"
-                sound = "multiwayinvitation"
-            elif "MEDIUM" in message:
-                level = "active"
-                sound = "newmail"
-            else:
-                level = "active"
-                sound = "birdsong"
-            
-            # 确保服务器地址格式正确
-            if self.bark_server.endswith('/'):
-                self.bark_server = self.bark_server.rstrip('/')
-            
             # 方法1: 使用 POST 请求 (推荐，避免 URL 长度限制)
-            url = f"{self.bark_server}/{self.bark_key}"
-            
-            # 构建请求数据
-            data = {
-                'title': title,
-                'body': message,
-                'level': level,
-                'sound': sound,
-                'group': 'GitHub安全扫描',
-                'icon': 'https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png'
-            }
-            
-            print(f"📤 发送 Bark 通知...")
+            url = base_url
             print(f"🔗 URL: {url}")
-            print(f"📋 数据: {{'title': '{title[:30]}...', 'level': '{level}', 'sound': '{sound}'}}")
             
             # 使用 POST 请求发送
-            response = requests.post(url, json=data, timeout=10)
+            response = self.session.post(url, json=data, timeout=10)
             
             if response.status_code == 200:
                 try:
@@ -348,7 +397,7 @@ class BarkNotifier:
                     else:
                         print(f"❌ Bark 服务器返回错误: {result}")
                         # 尝试备用方法
-                        return self._send_notification_fallback(title, message, level, sound)
+                        return self._send_notification_fallback(base_url, title, message, level, sound)
                 except json.JSONDecodeError:
                     # 如果响应不是 JSON，可能是成功的
                     if 'success' in response.text.lower() or response.status_code == 200:
@@ -356,12 +405,12 @@ class BarkNotifier:
                         return True
                     else:
                         print(f"❌ 响应解析失败: {response.text}")
-                        return self._send_notification_fallback(title, message, level, sound)
+                        return self._send_notification_fallback(base_url, title, message, level, sound)
             else:
                 print(f"❌ HTTP 请求失败: {response.status_code}")
                 print(f"📄 响应内容: {response.text}")
                 # 尝试备用方法
-                return self._send_notification_fallback(title, message, level, sound)
+                return self._send_notification_fallback(base_url, title, message, level, sound)
                 
         except requests.exceptions.Timeout:
             print("❌ 请求超时，请检查网络连接")
@@ -373,7 +422,7 @@ class BarkNotifier:
             print(f"❌ 发送通知失败: {e}")
             return False
     
-    def _send_notification_fallback(self, title, message, level, sound):
+    def _send_notification_fallback(self, base_url, title, message, level, sound):
         """备用发送方法 - 使用 GET 请求简化版本"""
         try:
             print("🔄 尝试备用发送方法...")
@@ -381,13 +430,12 @@ class BarkNotifier:
             # 简化消息内容以避免 URL 过长
             short_message = self._create_short_message(title, message)
             
-            # URL 编码
-            from urllib.parse import quote
-            encoded_title = quote(title.encode('utf-8'))
-            encoded_message = quote(short_message.encode('utf-8'))
+            # URL 编码（只在备用路径需要，quote 默认按 UTF-8 编码）
+            encoded_title = quote(title)
+            encoded_message = quote(short_message)
             
             # 构建简化的 GET 请求
-            url = f"{self.bark_server}/{self.bark_key}/{encoded_title}/{encoded_message}"
+            url = f"{base_url}/{encoded_title}/{encoded_message}"
             params = {
                 'level': level,
                 'sound': sound
@@ -395,7 +443,7 @@ class BarkNotifier:
             
             print(f"🔗 备用 URL: {url[:100]}...")
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 print(f"✅ 备用方法发送成功!")
@@ -411,12 +459,11 @@ class BarkNotifier:
     
     def _create_short_message(self, title, message):
         """创建简化的消息内容"""
-        lines = message.split('\n')
         short_lines = []
         
         # 保留重要信息
-        for line in lines:
-            if any(keyword in line for keyword in ['扫描时间', '风险等级', '总文件数', '公开仓库', '警告']):
+        for line in message.split('\n'):
+            if any(keyword in line for keyword in SHORT_MESSAGE_KEYWORDS):
                 short_lines.append(line)
             elif len(short_lines) < 5:  # 限制行数
                 short_lines.append(line)
@@ -434,7 +481,7 @@ class BarkNotifier:
         title = "🧪 GitHub 安全扫描测试"
         message = f"测试通知发送时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n这是一条测试消息，用于验证 Bark 通知配置是否正确。"
         
-        return self.send_notification(title, message, "passive")
+        return self.send_notification(title, message)
 
 
 def main():
@@ -445,58 +492,56 @@ def main():
         # 检查是否强制发送通知
         force_notify = os.environ.get('INPUT_FORCE_NOTIFY', 'false').lower() == 'true'
         
-        notifier = BarkNotifier()
-        
-        # 如果是强制通知且没有发现数据，发送测试通知
-        if force_notify:
-            if not os.path.exists('reports/new_findings_check.json'):
-                print("🧪 发送测试通知...")
-                success = notifier.send_test_notification()
-                exit(0 if success else 1)
-        
-        # 加载数据
-        check_data, raw_data = notifier.load_findings_data()
-        if not check_data or not raw_data:
-            print("❌ 无法加载必要数据，跳过通知")
-            exit(1)
-        
-        # 检查是否需要发送通知
-        has_new_findings = check_data.get('has_new_findings', False)
-        analysis = check_data.get('analysis', {})
-        total_files = analysis.get('total_files', 0)
-        
-        if not has_new_findings and not force_notify:
-            print("ℹ️ 无新发现且未强制通知，跳过发送")
-            exit(0)
-        
-        # 创建通知内容
-        title, message = notifier.create_notification_content(check_data, raw_data)
-        
-        print(f"📝 通知标题: {title}")
-        print(f"📄 通知内容预览: {message[:100]}...")
-        
-        # 发送通知
-        success = notifier.send_notification(title, message)
-        
-        if success:
-            # 记录通知发送日志
-            notification_log = {
-                'sent_at': datetime.now().isoformat(),
-                'title': title,
-                'total_files': total_files,
-                'public_files': analysis.get('public_files', 0),
-                'risk_level': analysis.get('risk_level', 'UNKNOWN'),
-                'repositories_count': len(analysis.get('repositories', [])),
-                'was_forced': force_notify
-            }
-            
-            os.makedirs('reports', exist_ok=True)
-            with open('reports/notification_log.json', 'w', encoding='utf-8') as f:
-                json.dump(notification_log, f, indent=2, ensure_ascii=False)
+        with BarkNotifier() as notifier:
+            # 如果是强制通知且没有发现数据，发送测试通知
+            if force_notify:
+                if not os.path.exists('reports/new_findings_check.json'):
+                    print("🧪 发送测试通知...")
+                    success = notifier.send_test_notification()
+                    exit(0 if success else 1)
+            
+            # 加载数据
+            check_data, raw_data = notifier.load_findings_data()
+            if not check_data or not raw_data:
+                print("❌ 无法加载必要数据，跳过通知")
+                exit(1)
+            
+            # 检查是否需要发送通知
+            has_new_findings = check_data.get('has_new_findings', False)
+            analysis = check_data.get('analysis', {})
+            total_files = analysis.get('total_files', 0)
+            
+            if not has_new_findings and not force_notify:
+                print("ℹ️ 无新发现且未强制通知，跳过发送")
+                exit(0)
+            
+            # 创建通知内容
+            title, message, risk_level = notifier.create_notification_content(check_data, raw_data)
+            
+            print(f"📝 通知标题: {title}")
+            print(f"📄 通知内容预览: {message[:100]}...")
+            
+            # 发送通知
+            success = notifier.send_notification(title, message, risk_level)
+            
+            if success:
+                # 记录通知发送日志
+                notification_log = {
+                    'sent_at': datetime.now().isoformat(),
+                    'title': title,
+                    'total_files': total_files,
+                    'public_files': analysis.get('public_files', 0),
+                    'risk_level': analysis.get('risk_level', 'UNKNOWN'),
+                    'repositories_count': len(analysis.get('repositories', [])),
+                    'was_forced': force_notify
+                }
+                
+                os.makedirs('reports', exist_ok=True)
+                dump_json(notification_log, 'reports/notification_log.json', atomic=True)
+                
+                print("📊 通知日志已保存")
             
-            print("📊 通知日志已保存")
-        
-        exit(0 if success else 1)
+            exit(0 if success else 1)
         
     except Exception as e:
         print(f"❌ 通知脚本执行失败: {e}")
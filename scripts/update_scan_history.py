@@ -4,71 +4,87 @@
 更新扫描历史记录，用于下次比较
 """
 
-import json
 import os
-import hashlib
 from datetime import datetime
 
+from json_utils import load_json, dump_json, write_text_atomic
+from scan_hash import results_hash, legacy_results_hash
 
-def calculate_results_hash(results_file='reports/raw_data.json'):
-    """计算结果的哈希值"""
+
+# scan_history.json 只由脚本读取，默认紧凑写入；设置 PRETTY_JSON=1 时按缩进格式写入便于人工查看
+PRETTY_JSON = os.environ.get('PRETTY_JSON') == '1'
+
+
+def calculate_results_hash(data):
+    """计算结果的哈希值（data 为已解析的 raw_data.json）"""
     try:
-        with open(results_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 提取关键信息用于哈希计算
-        key_data = []
-        for result in data.get('results', []):
-            key_info = {
-                'repo': result['repository']['full_name'],
-                'file': result['file']['path'],
-                'matches': result['file']['match_count'],
-                'last_modified': result.get('time_info', {}).get('last_commit', {}).get('last_modified', '')
-            }
-            key_data.append(key_info)
-        
-        # 按仓库和文件路径排序以确保一致性
-        key_data.sort(key=lambda x: (x['repo'], x['file']))
-        
-        # 计算哈希
-        content = json.dumps(key_data, sort_keys=True).encode()
-        return hashlib.sha256(content).hexdigest()
+        # 与 check_new_findings.py 使用同一实现，逐条增量计算，不再拼出整份序列化字符串
+        return results_hash(data.get('results', []))
         
     except Exception as e:
         print(f"❌ 计算哈希失败: {e}")
         return None
 
 
+def is_legacy_hash_match(data, previous_hash):
+    """上次的哈希是否为本次结果按旧格式计算的哈希"""
+    try:
+        return legacy_results_hash(data.get('results', [])) == previous_hash
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
 def update_scan_history():
     """更新扫描历史"""
     try:
+        # 本次运行的时间戳只取一次，写入各文件的时间保持一致
+        now_iso = datetime.now().isoformat()
+        
         # 确保历史目录存在
         history_dir = '.github/scan_history'
         os.makedirs(history_dir, exist_ok=True)
         
+        # 加载当前扫描数据，哈希和历史记录共用同一份解析结果
+        try:
+            current_data = load_json('reports/raw_data.json')
+        except (OSError, ValueError) as e:
+            print(f"❌ 加载扫描结果失败: {e}")
+            return False
+        
         # 计算当前结果哈希
-        current_hash = calculate_results_hash()
+        current_hash = calculate_results_hash(current_data)
         if not current_hash:
             print("❌ 无法计算当前结果哈希")
             return False
         
-        # 更新哈希文件
+        # 结果与上次相同时直接结束，不再重复写入历史记录和趋势报告，只记录本次检查时间
         hash_file = os.path.join(history_dir, 'last_scan_hash.txt')
-        with open(hash_file, 'w') as f:
-            f.write(current_hash)
+        try:
+            with open(hash_file, 'r', encoding='utf-8') as f:
+                previous_hash = f.read().strip()
+        except OSError:
+            previous_hash = None
+        
+        if previous_hash == current_hash:
+            write_text_atomic(os.path.join(history_dir, 'last_checked.txt'), now_iso)
+            print(f"ℹ️ 扫描结果未变化 ({current_hash[:12]}...)，跳过历史记录更新")
+            return True
+        
+        # 哈希文件还是旧格式（SHA-256）且与本次结果一致：结果并未变化，只把哈希文件改写为新格式
+        if previous_hash and is_legacy_hash_match(current_data, previous_hash):
+            write_text_atomic(hash_file, current_hash)
+            write_text_atomic(os.path.join(history_dir, 'last_checked.txt'), now_iso)
+            print(f"ℹ️ 扫描结果未变化，哈希文件已迁移为新格式: {current_hash[:12]}...")
+            return True
         
-        print(f"✅ 扫描哈希已更新: {current_hash[:12]}...")
+        # 更新哈希文件
+        write_text_atomic(hash_file, current_hash)
         
-        # 加载当前扫描数据
-        try:
-            with open('reports/raw_data.json', 'r', encoding='utf-8') as f:
-                current_data = json.load(f)
-        except:
-            current_data = {}
+        print(f"✅ 扫描哈希已更新: {current_hash[:12]}...")
         
         # 创建历史记录条目
         history_entry = {
-            'scan_time': current_data.get('scan_time', datetime.now().isoformat()),
+            'scan_time': current_data.get('scan_time', now_iso),
             'hash': current_hash,
             'total_found': current_data.get('total_found', 0),
             'analyzed_files': current_data.get('analyzed_files', 0),
@@ -80,7 +96,7 @@ def update_scan_history():
         
         # 更新历史记录文件
         history_file = os.path.join(history_dir, 'scan_history.json')
-        history_data = load_scan_history(history_file)
+        history_data = load_scan_history(history_file, now_iso)
         
         # 添加新记录到历史
         history_data['scans'].append(history_entry)
@@ -90,12 +106,11 @@ def update_scan_history():
             history_data['scans'] = history_data['scans'][-50:]
         
         # 更新统计信息
-        history_data['last_updated'] = datetime.now().isoformat()
+        history_data['last_updated'] = now_iso
         history_data['total_scans'] = len(history_data['scans'])
         
         # 保存历史记录
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, indent=2, ensure_ascii=False)
+        dump_json(history_data, history_file, atomic=True, indent=PRETTY_JSON)
         
         print(f"📊 扫描历史已更新，总记录数: {history_data['total_scans']}")
         
@@ -109,24 +124,26 @@ def update_scan_history():
         return False
 
 
-def load_scan_history(history_file):
-    """加载扫描历史"""
+def load_scan_history(history_file, now_iso=None):
+    """加载扫描历史（now_iso 用作新建历史记录的时间，默认取当前时间）"""
+    if now_iso is None:
+        now_iso = datetime.now().isoformat()
+    
     try:
-        with open(history_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_json(history_file)
     except FileNotFoundError:
         # 首次运行，创建新的历史结构
         return {
-            'created_at': datetime.now().isoformat(),
-            'last_updated': datetime.now().isoformat(),
+            'created_at': now_iso,
+            'last_updated': now_iso,
             'total_scans': 0,
             'scans': []
         }
     except Exception as e:
         print(f"⚠️ 加载历史记录失败: {e}，将创建新的历史记录")
         return {
-            'created_at': datetime.now().isoformat(),
-            'last_updated': datetime.now().isoformat(),
+            'created_at': now_iso,
+            'last_updated': now_iso,
             'total_scans': 0,
             'scans': []
         }
@@ -146,10 +163,19 @@ def create_scan_summary(current_data):
             'risk_level': 'NONE'
         }
     
-    public_files = sum(1 for r in results if not r['repository']['private'])
+    # 一次遍历同时统计公开文件数、总匹配数和涉及的仓库
+    public_files = 0
+    total_matches = 0
+    repos = set()
+    for r in results:
+        repository = r['repository']
+        if not repository['private']:
+            public_files += 1
+        total_matches += r['file']['match_count']
+        repos.add(repository['full_name'])
+    
     private_files = len(results) - public_files
-    total_matches = sum(r['file']['match_count'] for r in results)
-    repositories = list(set(r['repository']['full_name'] for r in results))
+    repositories = sorted(repos)  # 排序后输出稳定，历史文件的差异只反映真实变化
     
     # 计算风险等级
     if public_files > 0:
@@ -183,8 +209,47 @@ def generate_trend_report(history_data, history_dir):
             print("📈 扫描记录不足，跳过趋势分析")
             return
         
-        # 最近7天的数据
-        recent_scans = scans[-7:] if len(scans) >= 7 else scans
+        # 最近7次扫描的数据
+        recent_scans = scans[-7:]
+        
+        # 一次遍历收集各项趋势、风险等级分布，并同时累计和/最大/最小值；
+        # 窗口只有几条记录，直接用局部变量累计即可，不需要 NumPy
+        total_files_trend = []
+        public_files_trend = []
+        matches_trend = []
+        risk_levels = []
+        risk_distribution = {}
+        
+        first_summary = recent_scans[0]['summary']
+        total_files_sum = public_files_sum = matches_sum = 0
+        total_files_max = total_files_min = first_summary['total_files']
+        public_files_max = first_summary['public_files']
+        matches_max = first_summary['total_matches']
+        
+        for scan in recent_scans:
+            summary = scan['summary']
+            total_files = summary['total_files']
+            public_files = summary['public_files']
+            matches = summary['total_matches']
+            risk = summary['risk_level']
+            
+            total_files_trend.append(total_files)
+            public_files_trend.append(public_files)
+            matches_trend.append(matches)
+            risk_levels.append(risk)
+            risk_distribution[risk] = risk_distribution.get(risk, 0) + 1
+            
+            total_files_sum += total_files
+            public_files_sum += public_files
+            matches_sum += matches
+            if total_files > total_files_max:
+                total_files_max = total_files
+            if total_files < total_files_min:
+                total_files_min = total_files
+            if public_files > public_files_max:
+                public_files_max = public_files
+            if matches > matches_max:
+                matches_max = matches
         
         # 计算趋势
         trend_data = {
@@ -192,28 +257,25 @@ def generate_trend_report(history_data, history_dir):
             'first_scan': recent_scans[0]['scan_time'],
             'last_scan': recent_scans[-1]['scan_time'],
             'trends': {
-                'total_files': [scan['summary']['total_files'] for scan in recent_scans],
-                'public_files': [scan['summary']['public_files'] for scan in recent_scans],
-                'total_matches': [scan['summary']['total_matches'] for scan in recent_scans],
-                'risk_levels': [scan['summary']['risk_level'] for scan in recent_scans]
+                'total_files': total_files_trend,
+                'public_files': public_files_trend,
+                'total_matches': matches_trend,
+                'risk_levels': risk_levels
             },
             'statistics': {}
         }
         
         # 计算统计信息
-        total_files_trend = trend_data['trends']['total_files']
-        public_files_trend = trend_data['trends']['public_files']
-        matches_trend = trend_data['trends']['total_matches']
-        
-        if len(total_files_trend) >= 2:
+        scan_count = len(recent_scans)
+        if scan_count >= 2:
             trend_data['statistics'] = {
-                'avg_total_files': sum(total_files_trend) / len(total_files_trend),
-                'max_total_files': max(total_files_trend),
-                'min_total_files': min(total_files_trend),
-                'avg_public_files': sum(public_files_trend) / len(public_files_trend),
-                'max_public_files': max(public_files_trend),
-                'avg_matches': sum(matches_trend) / len(matches_trend),
-                'max_matches': max(matches_trend),
+                'avg_total_files': total_files_sum / scan_count,
+                'max_total_files': total_files_max,
+                'min_total_files': total_files_min,
+                'avg_public_files': public_files_sum / scan_count,
+                'max_public_files': public_files_max,
+                'avg_matches': matches_sum / scan_count,
+                'max_matches': matches_max,
                 'latest_vs_previous': {
                     'total_files_change': total_files_trend[-1] - total_files_trend[-2],
                     'public_files_change': public_files_trend[-1] - public_files_trend[-2],
@@ -222,16 +284,11 @@ def generate_trend_report(history_data, history_dir):
             }
         
         # 风险等级分布
-        risk_distribution = {}
-        for risk in trend_data['trends']['risk_levels']:
-            risk_distribution[risk] = risk_distribution.get(risk, 0) + 1
-        
         trend_data['risk_distribution'] = risk_distribution
         
         # 保存趋势报告
         trend_file = os.path.join(history_dir, 'trend_report.json')
-        with open(trend_file, 'w', encoding='utf-8') as f:
-            json.dump(trend_data, f, indent=2, ensure_ascii=False)
+        dump_json(trend_data, trend_file, atomic=True)
         
         print("📈 趋势报告已生成")
         
@@ -260,18 +317,19 @@ def generate_trend_report(history_data, history_dir):
 def cleanup_old_files(history_dir):
     """清理旧文件"""
     try:
-        # 清理超过30天的临时文件
-        import glob
+        # 清理超过30天的临时文件；scandir 直接遍历目录，每个条目的 stat 结果会被缓存
         import time
         
-        temp_pattern = os.path.join(history_dir, '*.tmp')
         current_time = time.time()
         
-        for temp_file in glob.glob(temp_pattern):
-            file_age = current_time - os.path.getmtime(temp_file)
-            if file_age > 30 * 24 * 3600:  # 30天
-                os.remove(temp_file)
-                print(f"🗑️ 清理旧文件: {temp_file}")
+        with os.scandir(history_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                file_age = current_time - entry.stat().st_mtime
+                if file_age > 30 * 24 * 3600:  # 30天
+                    os.remove(entry.path)
+                    print(f"🗑️ 清理旧文件: {entry.path}")
                 
     except Exception as e:
         print(f"⚠️ 清理旧文件失败: {e}")